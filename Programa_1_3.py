@@ -1,15 +1,26 @@
+import os
 import tkinter as tk
 from tkinter import messagebox
-import sympy as sp
-import matplotlib.pyplot as plt
-import numpy as np
-from PIL import Image, ImageTk
+
+from expresiones import parsear
+from muestreo import muestrear_adaptativo, rango_y
+from numerico import compilar
+from perezoso import ModuloPerezoso
+
+# sympy se carga con el primer cálculo y matplotlib con la primera gráfica
+sp = ModuloPerezoso('sympy')
+lienzo = ModuloPerezoso('lienzo')
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+IMAGEN = os.path.join(DIRECTORIO, "kitty.jpg")
+TAMANO_IMAGEN = (150, 150)
+# La imagen ya redimensionada se guarda como PNG, que Tk abre sin PIL
+IMAGEN_CACHE = os.path.join(DIRECTORIO, ".cache", "kitty_{}x{}.png".format(*TAMANO_IMAGEN))
 
 
 def formatear_funcion(expr):
-    """Convierte una expresión sympy a formato legible"""
-    x = sp.Symbol('x')
-    expr_sym = sp.sympify(expr)
+    """Convierte una expresión sympy (o su texto) a formato legible"""
+    expr_sym = parsear(expr) if isinstance(expr, str) else expr
     
     # Convertir a string y reemplazar formatos
     expr_str = str(expr_sym)
@@ -30,16 +41,46 @@ def formatear_funcion(expr):
     return expr_str, expr_sym
 
 
+def cargar_imagen():
+    """Devuelve la imagen redimensionada; PIL solo se usa si falta la copia en cache"""
+    if (not os.path.exists(IMAGEN_CACHE)
+            or os.path.getmtime(IMAGEN_CACHE) < os.path.getmtime(IMAGEN)):
+        from PIL import Image, ImageTk
+
+        image = Image.open(IMAGEN)
+        # Redimensionar la imagen si es muy grande (opcional)
+        image = image.resize(TAMANO_IMAGEN, Image.Resampling.LANCZOS)
+        try:
+            os.makedirs(os.path.dirname(IMAGEN_CACHE), exist_ok=True)
+            image.save(IMAGEN_CACHE)
+        except OSError:
+            # Sin permiso de escritura se muestra igual, pero sin cache
+            return ImageTk.PhotoImage(image)
+    return tk.PhotoImage(file=IMAGEN_CACHE)
+
+
+def obtener_grafica():
+    """Crea la gráfica incrustada la primera vez que se necesita"""
+    global grafica
+    if grafica is None:
+        grafica = lienzo.GraficaIncrustada(grafica_frame, figsize=(7, 4.5), etiquetas_y=("y",),
+                                           colores={'mínimo': 'green', 'máximo': 'red',
+                                                    'inflexión': 'black'})
+        # Espacio para el título de dos líneas (función y derivada)
+        grafica.figura.subplots_adjust(top=0.86)
+    return grafica
+
+
 def calcular():
     expr_str = entry_func.get()
     try:
         x = sp.Symbol('x')
-        f = sp.sympify(expr_str)
+        f = parsear(expr_str)
         f_prime = sp.diff(f, x)
         
         # Formatear funciones para mostrar
-        f_str, _ = formatear_funcion(expr_str)
-        f_prime_str, _ = formatear_funcion(str(f_prime))
+        f_str, _ = formatear_funcion(f)
+        f_prime_str, _ = formatear_funcion(f_prime)
         
         # Mostrar función y derivada en la interfaz
         label_func.config(text=f"f(x) = {f_str}")
@@ -60,7 +101,7 @@ def calcular():
         critical_points = sp.solve(sp.Eq(f_prime, 0), x)
 
         # Función numérica
-        f_lamb = sp.lambdify(x, f, 'numpy')
+        f_lamb = compilar(f, x)
 
         # Determinar rango automáticamente basado en puntos críticos
         if critical_points:
@@ -81,96 +122,35 @@ def calcular():
             x_min = center - 2
             x_max = center + 2
 
-        x_vals = np.linspace(x_min, x_max, 400)
-        y_vals = f_lamb(x_vals)
-
-        # Calcular límites de y
-        y_min = np.min(y_vals)
-        y_max = np.max(y_vals)
-        
-        # Ajustar para incluir puntos críticos
-        for c in critical_points:
-            if c.is_real:
-                y_c = float(f.subs(x, c))
-                y_min = min(y_min, y_c)
-                y_max = max(y_max, y_c)
-
-        # Agregar márgenes
-        y_range = y_max - y_min
-        if y_range == 0:  # Para funciones constantes
-            y_min -= 1
-            y_max += 1
-        else:
-            margin = y_range * 0.1  # 10% de margen
-            y_min -= margin
-            y_max += margin
-
-        # Hacer la gráfica proporcional
-        x_range = x_max - x_min
-        y_range_adj = y_max - y_min
-        
-        # Calcular relación de aspecto para que sea proporcional
-        fig_width = 8
-        fig_height = 6
-        
-        # Ajustar altura según el rango de y vs x
-        desired_ratio = y_range_adj / x_range
-        current_ratio = fig_height / fig_width
-        
-        if desired_ratio > current_ratio:
-            # La función es más "alta" que "ancha"
-            fig_height = fig_width * desired_ratio
-        else:
-            # La función es más "ancha" que "alta"
-            fig_width = fig_height / desired_ratio
-        
-        # Limitar el tamaño máximo de la figura
-        fig_width = min(fig_width, 12)
-        fig_height = min(fig_height, 10)
-        
-        # Limitar el tamaño mínimo de la figura
-        fig_width = max(fig_width, 6)
-        fig_height = max(fig_height, 4)
+        x_vals, y_vals = muestrear_adaptativo(f_lamb, x_min, x_max, max_puntos=400)
 
-
-
-        plt.figure(figsize=(fig_width, fig_height))
-        plt.plot(x_vals, y_vals, color="blue", label=f"f(x) = {f_str}", linewidth=2)
+        # Límites de y sin que los polos aplasten la curva, incluyendo los puntos críticos
+        y_criticos = [float(f.subs(x, c)) for c in critical_points if c.is_real]
+        y_min, y_max = rango_y(x_vals, y_vals, y_criticos) or (-1.0, 1.0)
 
         # Marcar máximos y mínimos
+        f2 = sp.diff(f_prime, x)
+        puntos = {}
         for c in critical_points:
             if c.is_real:
                 y_c = float(f.subs(x, c))
-                f2 = sp.diff(f_prime, x)
                 d2_val = float(f2.subs(x, c))
                 if d2_val > 0:
                     tipo = "mínimo"
-                    color = "green"
                 elif d2_val < 0:
                     tipo = "máximo"
-                    color = "red"
                 else:
                     tipo = "inflexión"
-                    color = "black"
-                plt.scatter(float(c), y_c, color=color, s=100, zorder=5,
-                            label=f"{tipo} en x={float(c):.2f}")
+                xs, ys = puntos.setdefault(tipo, ([], []))
+                xs.append(float(c))
+                ys.append(y_c)
 
-        # Establecer límites y hacer ejes proporcionales
-        plt.xlim(x_min, x_max)
-        plt.ylim(y_min, y_max)
-        
-        # Hacer que la escala sea igual en ambos ejes (proporcional)
-        plt.gca().set_aspect('auto')  # 'auto' para ajuste automático
-        
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.title(f"Función: f(x) = {f_str}\nDerivada: f'(x) = {f_prime_str}")
-        plt.xlabel("x")
-        plt.ylabel("y")
-        
-        # Ajustar diseño
-        plt.tight_layout()
-        plt.show()
+        # Reutilizar la gráfica incrustada: solo cambian los datos, límites y título
+        grafica = obtener_grafica()
+        grafica.actualizar(0, x_vals, y_vals, puntos=puntos,
+                           limites=((x_min, x_max), (y_min, y_max)))
+        grafica.titulo(0, f"Función: f(x) = {f_str}\nDerivada: f'(x) = {f_prime_str}")
+        grafica.dibujar()
 
     except Exception as e:
         messagebox.showerror("Error", f"Ocurrió un error: {e}")
@@ -182,7 +162,7 @@ root.title("Máximos y Mínimos - Función y Derivada")
 
 # Frame principal para organizar mejor los elementos
 main_frame = tk.Frame(root)
-main_frame.pack(padx=10, pady=10)
+main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
 # Frame para la imagen y los controles
 top_frame = tk.Frame(main_frame)
@@ -191,10 +171,7 @@ top_frame.pack(fill=tk.X)
 # Cargar y mostrar la imagen kitty.jpg
 try:
     # Intentar cargar la imagen
-    image = Image.open("kitty.jpg")
-    # Redimensionar la imagen si es muy grande (opcional)
-    image = image.resize((150, 150), Image.Resampling.LANCZOS)
-    photo = ImageTk.PhotoImage(image)
+    photo = cargar_imagen()
     
     # Crear label para la imagen
     image_label = tk.Label(top_frame, image=photo)
@@ -237,6 +214,11 @@ label_func_pretty.pack(anchor=tk.W)
 label_derivada_pretty = tk.Label(resultados_frame, text="", font=("Courier New", 9))
 label_derivada_pretty.pack(anchor=tk.W)
 
+# Gráfica incrustada en la ventana (se reutiliza en cada cálculo)
+grafica_frame = tk.Frame(main_frame)
+grafica_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+grafica = None
+
 # Instrucciones
 instrucciones_frame = tk.Frame(main_frame)
 instrucciones_frame.pack(fill=tk.X, pady=(10, 0))
@@ -1,224 +1,99 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox, ttk
-import sympy as sp
-import matplotlib.pyplot as plt
 import numpy as np
-from PIL import Image, ImageTk
-from sympy import oo
 import warnings
 warnings.filterwarnings('ignore')
 
-# ==================== FUNCIONES DE VALIDACIÓN Y CÁLCULO ====================
+from etapas import ETAPAS_AVANZADAS, ETAPAS_BASICAS
+from muestreo import muestrear_adaptativo
+from numerico import compilar
+from perezoso import ModuloPerezoso
+from rendimiento import Rendimiento, medir
 
-def validar_funcion(expr):
-    """Valida que la función sea correcta"""
-    try:
-        x = sp.Symbol('x')
-        f = sp.parse_expr(expr, transformations='all')
-        # Verificar que dependa de x
-        if x not in f.free_symbols:
-            raise ValueError("La función debe depender de la variable x")
-        return f
-    except Exception as e:
-        raise ValueError(f"Función inválida: {e}")
+# La ventana abre sin esperar a sympy (lo carga el primer cálculo) ni a
+# matplotlib (lo carga la primera gráfica)
+sp = ModuloPerezoso('sympy')
+analisis = ModuloPerezoso('analisis')
+lienzo = ModuloPerezoso('lienzo')
 
-def formatear_funcion(expr):
-    """Convierte una expresión sympy a formato legible"""
-    try:
-        x = sp.Symbol('x')
-        expr_sym = sp.parse_expr(expr, transformations='all')
-        
-        # Convertir a LaTeX para mejor visualización
-        try:
-            expr_str = sp.latex(expr_sym)
-        except:
-            expr_str = str(expr_sym)
-        
-        # Reemplazos para mejor legibilidad
-        reemplazos = {
-            '**': '^',
-            'sin': 'sen',
-            'asin': 'arcsen',
-            'acos': 'arccos',
-            'atan': 'arctan'
-        }
-        
-        for viejo, nuevo in reemplazos.items():
-            expr_str = expr_str.replace(viejo, nuevo)
-        
-        return expr_str, expr_sym
-    except Exception as e:
-        raise ValueError(f"Error al procesar la expresión: {e}")
+# Tiempo máximo de cada etapa del análisis, en segundos
+LIMITE_ETAPA = 10
+MENSAJE_TIEMPO_AGOTADO = f"No disponible: el cálculo tardó más de {LIMITE_ETAPA} s"
 
-def encontrar_puntos_criticos(f, x):
-    """Encuentra puntos críticos de manera más robusta"""
-    f_prime = sp.diff(f, x)
-    
-    # Resolver ecuación derivada = 0
-    try:
-        critical_points = sp.solve(sp.Eq(f_prime, 0), x)
-    except:
-        critical_points = []
-    
-    # Filtrar solo puntos reales y eliminar duplicados
-    puntos_reales = []
-    for punto in critical_points:
-        if punto.is_real:
-            try:
-                valor = float(punto)
-                # Evitar duplicados
-                if not any(abs(valor - p[0]) < 1e-5 for p in puntos_reales):
-                    puntos_reales.append((valor, 'derivada_cero'))
-            except:
-                continue
-    
-    return puntos_reales
+# Mensaje de la pestaña avanzada mientras no se ha abierto
+MENSAJE_AVANZADO_PENDIENTE = "Se calcula al abrir esta pestaña"
+# ... y después de un análisis que se inició solo, mientras se escribía
+MENSAJE_AVANZADO_AL_ESCRIBIR = "Se calcula al presionar Calcular o al abrir esta pestaña"
 
-def clasificar_punto_critico(f, x, punto):
-    """Clasifica un punto crítico de manera más precisa"""
-    f_prime = sp.diff(f, x)
-    f_double_prime = sp.diff(f_prime, x)
-    
-    try:
-        seg_derivada = f_double_prime.subs(x, punto)
-        if seg_derivada > 0:
-            return "mínimo"
-        elif seg_derivada < 0:
-            return "máximo"
-        else:
-            # Usar criterio de mayor orden
-            return "posible punto de inflexión"
-    except:
-        return "indeterminado"
+# Cada cuánto revisa la interfaz los avances del hilo de cálculo (ms)
+INTERVALO_REVISION = 50
 
-def determinar_rango_optimo(f, critical_points, x):
-    """Determina el rango óptimo para la gráfica"""
-    if critical_points:
-        puntos_x = [p[0] for p in critical_points]
-        x_min = min(puntos_x) - 3
-        x_max = max(puntos_x) + 3
-    else:
-        # Evaluar la función en algunos puntos para determinar comportamiento
-        try:
-            # Probar diferentes rangos para ver dónde está definida la función
-            test_points = np.linspace(-10, 10, 50)
-            f_lamb = sp.lambdify(x, f, 'numpy')
-            y_test = f_lamb(test_points)
-            defined_points = test_points[np.isfinite(y_test)]
-            if len(defined_points) > 0:
-                x_min = max(-10, np.min(defined_points) - 2)
-                x_max = min(10, np.max(defined_points) + 2)
-            else:
-                x_min, x_max = -5, 5
-        except:
-            x_min, x_max = -5, 5
-    
-    # Asegurar un rango mínimo
-    if x_max - x_min < 4:
-        center = (x_min + x_max) / 2
-        x_min = center - 2
-        x_max = center + 2
-    
-    return x_min, x_max
+# Vista previa en vivo: espera tras cada tecla antes de graficar (ms), espera sin
+# cambios antes del análisis completo (ms) y tiempo máximo de la vista previa (s)
+RETARDO_VISTA_PREVIA = 150
+RETARDO_ANALISIS_COMPLETO = 800
+LIMITE_VISTA_PREVIA = 1
 
-def calcular_integral(f, x):
-    """Calcula la integral indefinida"""
-    try:
-        return sp.integrate(f, x)
-    except:
-        return "No se pudo calcular la integral"
+# Nombres legibles de las etapas para el indicador de progreso
+NOMBRES_ETAPAS = {
+    'parseo': "Interpretando la función",
+    'derivada': "Derivando",
+    'puntos_criticos': "Buscando puntos críticos",
+    'clasificacion': "Clasificando puntos críticos",
+    'segunda_derivada': "Calculando la segunda derivada",
+    'integral': "Integrando",
+    'taylor': "Calculando la serie de Taylor",
+    'limites': "Calculando límites",
+    'dominio': "Analizando el dominio",
+}
 
-def calcular_taylor(f, x, punto=0, orden=5):
-    """Calcula serie de Taylor alrededor de un punto"""
-    try:
-        return sp.series(f, x, punto, orden).removeO()
-    except:
-        return "No se pudo calcular la serie de Taylor"
+# Funciones de la ventana de ejemplos
+EJEMPLOS = [
+    "x^2 + 2*x + 1",
+    "x^3 - 3*x",
+    "sin(x)",
+    "cos(x)",
+    "exp(x)",
+    "log(x + 1)",
+    "1/(x^2 + 1)",
+    "sqrt(x^2 + 1)",
+    "x*sin(x)",
+    "exp(-x^2)"
+]
 
 # ==================== FUNCIONES DE VISUALIZACIÓN ====================
 
-def crear_grafica_mejorada(f, f_str, f_prime_str, critical_points, x):
-    """Crea una gráfica más informativa y profesional"""
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
-    
+def tipo_grafica(tipo):
+    """Grupo de puntos de la gráfica al que pertenece un tipo de punto crítico"""
+    return 'mínimo' if 'mínimo' in tipo else 'máximo' if 'máximo' in tipo else 'otro'
+
+def actualizar_grafica(grafica, f, puntos_criticos, x):
+    """Actualiza la gráfica incrustada con la función, su derivada y los puntos críticos"""
     # Configurar rango de x de manera más inteligente
-    x_min, x_max = determinar_rango_optimo(f, critical_points, x)
-    x_vals = np.linspace(x_min, x_max, 1000)
+    x_min, x_max = analisis.determinar_rango_optimo(f, [(p, tipo) for p, _, tipo in puntos_criticos], x)
+    
+    # Cada curva se muestrea donde más lo necesita
+    x_vals, y_vals = muestrear_adaptativo(compilar(f, x), x_min, x_max, max_puntos=1000)
+    
+    # Marcar puntos críticos (ya evaluados y clasificados por el análisis)
+    puntos = {}
+    for punto, y_val, tipo in puntos_criticos:
+        xs, ys = puntos.setdefault(tipo_grafica(tipo), ([], []))
+        xs.append(punto)
+        ys.append(y_val)
+    grafica.actualizar(0, x_vals, y_vals, puntos=puntos)
     
-    # Convertir a función numérica
+    # Gráfica de la derivada, marcando donde es cero; si no se puede evaluar queda vacía
     try:
-        f_lamb = sp.lambdify(x, f, 'numpy')
-        f_prime_lamb = sp.lambdify(x, sp.diff(f, x), 'numpy')
-        
-        y_vals = f_lamb(x_vals)
-        y_prime_vals = f_prime_lamb(x_vals)
-        
-        # Gráfica de la función
-        ax1.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'f(x)')
-        
-        # Marcar puntos críticos
-        for punto, _ in critical_points:
-            y_val = float(f.subs(x, punto))
-            tipo = clasificar_punto_critico(f, x, punto)
-            color = 'green' if 'mínimo' in tipo else 'red' if 'máximo' in tipo else 'orange'
-            ax1.scatter(punto, y_val, color=color, s=100, zorder=5, 
-                       label=f'{tipo} en x={punto:.2f}')
-        
-        ax1.set_title('Función y Puntos Críticos')
-        ax1.legend()
-        ax1.grid(True, alpha=0.3)
-        ax1.set_xlabel('x')
-        ax1.set_ylabel('f(x)')
-        
-        # Gráfica de la derivada
-        ax2.plot(x_vals, y_prime_vals, 'r-', linewidth=2, label=f"f'(x)")
-        ax2.axhline(y=0, color='k', linestyle='--', alpha=0.5)
-        
-        # Marcar donde la derivada es cero
-        for punto, _ in critical_points:
-            ax2.axvline(x=punto, color='gray', linestyle=':', alpha=0.7)
-        
-        ax2.set_title('Derivada de la Función')
-        ax2.legend()
-        ax2.grid(True, alpha=0.3)
-        ax2.set_xlabel('x')
-        ax2.set_ylabel("f'(x)")
-        
-        plt.tight_layout()
-        return fig
-        
-    except Exception as e:
-        plt.close()
-        # Intentar gráfica simple si falla la doble
-        return crear_grafica_simple(f, f_str, f_prime_str, critical_points, x)
-
-def crear_grafica_simple(f, f_str, f_prime_str, critical_points, x):
-    """Crea una gráfica simple como fallback"""
-    x_min, x_max = determinar_rango_optimo(f, critical_points, x)
-    x_vals = np.linspace(x_min, x_max, 1000)
-    
-    f_lamb = sp.lambdify(x, f, 'numpy')
-    y_vals = f_lamb(x_vals)
-    
-    plt.figure(figsize=(10, 6))
-    plt.plot(x_vals, y_vals, 'b-', linewidth=2, label=f'f(x) = {f_str}')
-    
-    # Marcar puntos críticos
-    for punto, _ in critical_points:
-        y_val = float(f.subs(x, punto))
-        tipo = clasificar_punto_critico(f, x, punto)
-        color = 'green' if 'mínimo' in tipo else 'red' if 'máximo' in tipo else 'orange'
-        plt.scatter(punto, y_val, color=color, s=100, zorder=5, 
-                   label=f'{tipo} en x={punto:.2f}')
-    
-    plt.title(f'Función: f(x) = {f_str}')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.xlabel('x')
-    plt.ylabel('f(x)')
-    plt.tight_layout()
-    
-    return plt.gcf()
+        x_prime_vals, y_prime_vals = muestrear_adaptativo(analisis.compilar_derivada(f, x),
+                                                          x_min, x_max, max_puntos=1000)
+    except Exception:
+        x_prime_vals, y_prime_vals = np.array([]), np.array([])
+    grafica.actualizar(1, x_prime_vals, y_prime_vals,
+                       verticales=[punto for punto, _, _ in puntos_criticos])
+    grafica.dibujar()
 
 # ==================== CLASE PRINCIPAL DE LA APLICACIÓN ====================
 
@@ -227,6 +102,24 @@ class CalculadoraCalculo:
         self.root = root
         self.root.title("Calculadora de Maximos, Minimos y Derivación")
         self.root.geometry("800x700")
+        # Estado del cálculo en segundo plano
+        self.cola = None
+        self.cancelacion = None
+        self.pendiente = None
+        self.ultimo_texto = None
+        self.etapas_listas = set()
+        self.etapas_en_curso = ETAPAS_BASICAS
+        self.grafica_mostrada = False
+        self.analisis_cancelado = False
+        # El análisis en curso lo inició la vista previa, no el usuario
+        self.analisis_automatico = False
+        # Último análisis básico y estado de su parte avanzada (None, 'calculando' o 'listo')
+        self.resultado = None
+        self.estado_avanzado = None
+        # La gráfica se crea al mostrar la primera curva
+        self._grafica = None
+        # Informes de rendimiento del último cálculo: análisis básico, avanzado e interfaz
+        self.informes = {}
         self.setup_ui()
     
     def setup_ui(self):
@@ -251,6 +144,7 @@ class CalculadoraCalculo:
         self.entry_func.grid(row=0, column=1, sticky='we', padx=5)
         self.entry_func.insert(0, "x**3 - 3*x")
         self.entry_func.bind('<Return>', lambda e: self.calcular())
+        self.entry_func.bind('<KeyRelease>', lambda e: self.texto_modificado())
         
         # Configurar peso de columna para que se expanda
         input_frame.columnconfigure(1, weight=1)
@@ -265,6 +159,27 @@ class CalculadoraCalculo:
                  bg="lightyellow", font=("Arial", 10), width=10).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Ejemplos", command=self.mostrar_ejemplos,
                  bg="lightgreen", font=("Arial", 10), width=10).pack(side=tk.LEFT, padx=5)
+        self.boton_cancelar = tk.Button(button_frame, text="Cancelar", command=self.cancelar,
+                                        bg="mistyrose", font=("Arial", 10), width=10,
+                                        state=tk.DISABLED)
+        self.boton_cancelar.pack(side=tk.LEFT, padx=5)
+        self.vista_previa_activa = tk.BooleanVar(value=True)
+        tk.Checkbutton(button_frame, text="Vista previa en vivo", variable=self.vista_previa_activa,
+                       font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        self.precalcular_avanzado = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Precalcular avanzado", variable=self.precalcular_avanzado,
+                       font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        self.perfilar = tk.BooleanVar(value=False)
+        tk.Checkbutton(button_frame, text="Perfilar", variable=self.perfilar,
+                       font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
+        
+        # Progreso del cálculo por etapas
+        progress_frame = tk.Frame(input_frame)
+        progress_frame.grid(row=2, column=0, columnspan=2, sticky='we')
+        self.progreso = ttk.Progressbar(progress_frame, maximum=len(ETAPAS_BASICAS), length=200)
+        self.progreso.pack(side=tk.LEFT, padx=5)
+        self.label_estado = tk.Label(progress_frame, text="", font=("Arial", 9), anchor='w')
+        self.label_estado.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         # Frame de resultados
         self.result_frame = tk.LabelFrame(main_frame, text="Resultados", 
@@ -274,6 +189,7 @@ class CalculadoraCalculo:
         # Notebook (pestañas) para organizar resultados
         self.notebook = ttk.Notebook(self.result_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', lambda e: self.pestana_cambiada())
         
         # Pestaña de resultados básicos
         self.basic_tab = tk.Frame(self.notebook)
@@ -283,12 +199,26 @@ class CalculadoraCalculo:
         self.advanced_tab = tk.Frame(self.notebook)
         self.notebook.add(self.advanced_tab, text="Análisis Avanzado")
         
+        # Pestaña con la gráfica incrustada (se reutiliza en cada cálculo)
+        self.graph_tab = tk.Frame(self.notebook)
+        self.notebook.add(self.graph_tab, text="Gráfica")
+        
+        # Pestaña con el tiempo de cada etapa
+        self.performance_tab = tk.Frame(self.notebook)
+        self.notebook.add(self.performance_tab, text="Rendimiento")
+        
         # Configurar pestaña básica
         self.setup_basic_tab()
         
         # Configurar pestaña avanzada
         self.setup_advanced_tab()
         
+        # Configurar pestaña de la gráfica
+        self.setup_graph_tab()
+        
+        # Configurar pestaña de rendimiento
+        self.setup_performance_tab()
+        
         # Configurar estilos de texto
         self.text_basic.tag_configure("titulo", font=("Arial", 11, "bold"), 
                                      foreground="darkblue")
@@ -299,6 +229,9 @@ class CalculadoraCalculo:
         self.text_advanced.tag_configure("titulo", font=("Arial", 11, "bold"), 
                                         foreground="darkblue")
         self.text_advanced.tag_configure("resultado", font=("Courier New", 9))
+        
+        self.text_performance.tag_configure("titulo", font=("Arial", 11, "bold"),
+                                           foreground="darkblue")
     
     def setup_basic_tab(self):
         """Configura la pestaña de análisis básico"""
@@ -320,65 +253,340 @@ class CalculadoraCalculo:
         self.text_advanced.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar_advanced.pack(side=tk.RIGHT, fill=tk.Y)
     
-    def calcular(self):
-        """Realiza todos los cálculos y muestra resultados"""
+    def setup_graph_tab(self):
+        """Configura la pestaña con la función y su derivada"""
+        self.label_grafica = tk.Label(self.graph_tab, text="La gráfica aparecerá al calcular",
+                                      font=("Arial", 10), fg="gray")
+        self.label_grafica.pack(expand=True)
+    
+    def setup_performance_tab(self):
+        """Configura la pestaña con el tiempo y el tamaño de cada etapa"""
+        self.text_performance = tk.Text(self.performance_tab, wrap=tk.NONE, height=20,
+                                        font=("Courier New", 9))
+        scrollbar_performance = tk.Scrollbar(self.performance_tab,
+                                             command=self.text_performance.yview)
+        self.text_performance.config(yscrollcommand=scrollbar_performance.set)
+        
+        self.text_performance.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar_performance.pack(side=tk.RIGHT, fill=tk.Y)
+    
+    @property
+    def grafica(self):
+        """Gráfica incrustada; matplotlib se importa la primera vez que se usa"""
+        if self._grafica is None:
+            self.label_grafica.destroy()
+            self._grafica = lienzo.GraficaIncrustada(self.graph_tab, paneles=2, figsize=(8, 6),
+                                                     titulos=('Función y Puntos Críticos',
+                                                              'Derivada de la Función'),
+                                                     etiquetas_y=('f(x)', "f'(x)"), eje_cero=(1,))
+        return self._grafica
+    
+    def calcular(self, automatico=False):
+        """
+        Inicia el análisis en un hilo aparte para no bloquear la ventana.
+
+        automatico indica que lo inició la vista previa tras una pausa al escribir.
+        """
+        expr = self.entry_func.get().strip()
+        if not expr:
+            messagebox.showwarning("Advertencia", "Por favor ingresa una función")
+            return
+        
+        # Un cálculo nuevo reemplaza al que esté en curso
+        self.cancelar_pendiente()
+        self.cancelar()
+        self.ultimo_texto = expr
+        self.etapas_listas = set()
+        self.grafica_mostrada = False
+        self.resultado = None
+        self.estado_avanzado = None
+        self.analisis_automatico = automatico
+        self.informes = {'Interfaz': Rendimiento()}
+        # Las etapas lentas solo se calculan si se abre la pestaña avanzada
+        self.iniciar_analisis(expr, ETAPAS_BASICAS)
+    
+    def calcular_avanzado(self):
+        """Calcula integral, serie de Taylor, límites y dominio de la última función"""
+        self.estado_avanzado = 'calculando'
+        self.iniciar_analisis(self.resultado.entrada, ('parseo',) + ETAPAS_AVANZADAS)
+        self.mostrar_resultados_avanzados(self.resultado)
+    
+    def pestana_avanzada_visible(self):
+        return self.notebook.select() == str(self.advanced_tab)
+    
+    def pestana_cambiada(self):
+        """Al abrir la pestaña avanzada se calcula su contenido, si aún no se hizo"""
+        if self.notebook.select() == str(self.performance_tab):
+            self.mostrar_rendimiento()
+        if (self.pestana_avanzada_visible() and self.cola is None and self.resultado is not None
+                and self.estado_avanzado is None):
+            self.calcular_avanzado()
+    
+    def iniciar_analisis(self, expr, etapas):
+        """Lanza en un hilo aparte las etapas indicadas del análisis"""
+        self.cola = queue.Queue()
+        self.cancelacion = threading.Event()
+        self.etapas_en_curso = etapas
+        self.analisis_cancelado = False
+        
+        self.progreso.config(maximum=len(etapas))
+        self.progreso['value'] = 0
+        self.label_estado.config(text=NOMBRES_ETAPAS[etapas[0]] + "...")
+        self.boton_cancelar.config(state=tk.NORMAL)
+        
+        perfilar = self.perfilar.get()
+        hilo = threading.Thread(target=self.trabajar,
+                                args=(expr, etapas, self.cola, self.cancelacion, perfilar),
+                                daemon=True)
+        hilo.start()
+        self.root.after(INTERVALO_REVISION, self.revisar_cola, self.cola)
+    
+    def texto_modificado(self):
+        """Al escribir: cancela lo que esté en curso y programa una vista previa"""
+        expr = self.entry_func.get().strip()
+        if expr == self.ultimo_texto:
+            return
+        self.ultimo_texto = expr
+        # El último análisis ya no corresponde al texto: abrir la pestaña avanzada
+        # antes del análisis nuevo no debe calcular (ni mostrar) la función anterior
+        self.resultado = None
+        self.estado_avanzado = None
+        if not self.vista_previa_activa.get():
+            return
+        self.cancelar_pendiente()
+        self.cancelar()
+        if expr:
+            self.pendiente = self.root.after(RETARDO_VISTA_PREVIA, self.iniciar_vista_previa, expr)
+    
+    def cancelar_pendiente(self):
+        """Descarta la vista previa o el análisis programados que aún no empezaron"""
+        if self.pendiente is not None:
+            self.root.after_cancel(self.pendiente)
+            self.pendiente = None
+    
+    def iniciar_vista_previa(self, expr):
+        """Grafica la función en un hilo aparte usando solo las etapas baratas"""
+        self.pendiente = None
+        self.cola = queue.Queue()
+        self.cancelacion = threading.Event()
+        hilo = threading.Thread(target=self.trabajar_vista_previa,
+                                args=(expr, self.cola, self.cancelacion), daemon=True)
+        hilo.start()
+        self.root.after(INTERVALO_REVISION, self.revisar_cola, self.cola)
+    
+    def trabajar_vista_previa(self, expr, cola, cancelacion):
+        """Hilo de la vista previa: interpreta, compila y muestrea la función"""
         try:
-            expr = self.entry_func.get().strip()
-            if not expr:
-                messagebox.showwarning("Advertencia", "Por favor ingresa una función")
-                return
-            
-            # Validar y procesar función
-            f = validar_funcion(expr)
-            x = sp.Symbol('x')
-            
-            # Cálculos básicos
-            f_prime = sp.diff(f, x)
-            puntos_criticos = encontrar_puntos_criticos(f, x)
-            
-            # Clasificar puntos críticos
-            puntos_clasificados = []
-            for punto, _ in puntos_criticos:
-                tipo = clasificar_punto_critico(f, x, punto)
-                puntos_clasificados.append((punto, tipo))
-            
-            # Mostrar resultados en las pestañas
-            self.mostrar_resultados_basicos(f, f_prime, puntos_clasificados, x)
-            self.mostrar_resultados_avanzados(f, x)
-            
-            # Crear y mostrar gráfica
-            fig = crear_grafica_mejorada(f, sp.latex(f), sp.latex(f_prime), 
-                                       puntos_clasificados, x)
-            plt.show()
-            
+            cola.put(('vista_previa', analisis.ejecutar_con_limite(analisis.vista_previa, expr,
+                                                                   limite=LIMITE_VISTA_PREVIA,
+                                                                   cancelacion=cancelacion)))
+        except (ValueError, analisis.EtapaInterrumpida) as e:
+            cola.put(('vista_previa', e))
+    
+    def vista_previa_terminada(self, datos):
+        """Muestra la curva preliminar y programa el análisis completo si el texto no cambia"""
+        self.cola = None
+        self.cancelacion = None
+        if isinstance(datos, Exception):
+            # Lo normal mientras se escribe: la expresión aún está incompleta
+            self.label_estado.config(text="Vista previa no disponible: expresión incompleta"
+                                     if isinstance(datos, ValueError) else "")
+            return
+        f, x_vals, y_vals = datos
+        self.grafica.actualizar(0, x_vals, y_vals)
+        self.grafica.actualizar(1, [], [])
+        self.grafica.dibujar()
+        self.label_estado.config(text="Vista previa")
+        self.pendiente = self.root.after(RETARDO_ANALISIS_COMPLETO, self.calcular, True)
+    
+    def trabajar(self, expr, etapas, cola, cancelacion, perfilar=False):
+        """Hilo de cálculo: envía a la interfaz cada etapa en cuanto termina"""
+        try:
+            # Analizar con un tiempo máximo por etapa
+            for evento in analisis.analizar_por_etapas(expr, limite=LIMITE_ETAPA,
+                                                       cancelacion=cancelacion, etapas=etapas,
+                                                       perfilar=perfilar, memoria=perfilar):
+                cola.put(evento)
+        except Exception as e:
+            cola.put(e)
+    
+    def revisar_cola(self, cola):
+        """Procesa en el hilo de la interfaz los eventos del hilo de cálculo"""
+        if cola is not self.cola:
+            # Pertenece a un cálculo cancelado o reemplazado
+            return
+        try:
+            while True:
+                evento = cola.get_nowait()
+                if isinstance(evento, tuple):
+                    self.vista_previa_terminada(evento[1])
+                    return
+                if isinstance(evento, Exception):
+                    self.calculo_terminado(None)
+                    messagebox.showerror("Error", f"Ocurrió un error: {str(evento)}")
+                    return
+                if evento.etapa == 'fin':
+                    self.calculo_terminado(evento.resultado)
+                    return
+                self.etapa_completada(evento)
+        except queue.Empty:
+            pass
+        self.root.after(INTERVALO_REVISION, self.revisar_cola, cola)
+    
+    def etapa_completada(self, evento):
+        """Actualiza el progreso y muestra el resultado de la etapa en su pestaña"""
+        nombre, resultado = evento.etapa, evento.resultado
+        self.etapas_listas.add(nombre)
+        etapas = self.etapas_en_curso
+        indice = etapas.index(nombre) + 1
+        self.progreso['value'] = indice
+        if indice < len(etapas):
+            self.label_estado.config(text=NOMBRES_ETAPAS[etapas[indice]] + "...")
+        
+        self.informes[self.nombre_informe()] = resultado.rendimiento
+        if self.notebook.select() == str(self.performance_tab):
+            self.mostrar_rendimiento()
+        
+        if resultado.funcion is None:
+            return
+        if nombre in ETAPAS_AVANZADAS:
+            self.mostrar_resultados_avanzados(resultado)
+        elif etapas == ETAPAS_BASICAS:
+            self.mostrar_resultados_basicos(resultado)
+        
+        # La gráfica solo necesita f' y los puntos críticos ya clasificados
+        if nombre == 'clasificacion':
+            self.mostrar_grafica(resultado)
+    
+    def calculo_terminado(self, resultado):
+        """Muestra los resultados finales y deja la interfaz lista para otro cálculo"""
+        self.cola = None
+        self.cancelacion = None
+        self.boton_cancelar.config(state=tk.DISABLED)
+        if resultado is None:
+            self.label_estado.config(text="")
+            return
+        
+        self.informes[self.nombre_informe()] = resultado.rendimiento
+        self.mostrar_rendimiento()
+        if resultado.error is None:
+            self.progreso['value'] = len(self.etapas_en_curso)
+        self.label_estado.config(text=resultado.error or f"Listo en {resultado.tiempo:.2f} s")
+        if resultado.funcion is None:
+            if resultado.error != "Análisis cancelado":
+                messagebox.showerror("Error", f"Ocurrió un error: {resultado.error}")
+            return
+        
+        self.analisis_cancelado = resultado.error == "Análisis cancelado"
+        if self.etapas_en_curso != ETAPAS_BASICAS:
+            # Si se canceló, se vuelve a intentar la próxima vez que se abra la pestaña
+            self.estado_avanzado = None if self.analisis_cancelado else 'listo'
+            self.mostrar_resultados_avanzados(resultado)
+            return
+        
+        self.resultado = resultado
+        self.mostrar_resultados_basicos(resultado)
+        self.mostrar_resultados_avanzados(resultado)
+        if not self.grafica_mostrada:
+            self.mostrar_grafica(resultado)
+        # Con la pestaña abierta (o el precálculo activado) se sigue con las etapas
+        # lentas, salvo mientras se escribe: la próxima tecla las cancelaría y el hilo
+        # auxiliar de la etapa seguiría ocupando CPU (ver analisis.ejecutar_con_limite)
+        if (not self.analisis_cancelado and not self.analisis_automatico
+                and (self.pestana_avanzada_visible() or self.precalcular_avanzado.get())):
+            self.calcular_avanzado()
+    
+    def mostrar_grafica(self, resultado):
+        """Actualiza la gráfica de la función y su derivada"""
+        if resultado.derivada is None:
+            return
+        self.grafica_mostrada = True
+        try:
+            with medir(self.informes.get('Interfaz'), 'grafica'):
+                actualizar_grafica(self.grafica, resultado.funcion, resultado.puntos_criticos,
+                                   sp.Symbol('x'))
         except Exception as e:
             messagebox.showerror("Error", f"Ocurrió un error: {str(e)}")
+        self.mostrar_rendimiento()
+    
+    def nombre_informe(self):
+        return "Análisis básico" if self.etapas_en_curso == ETAPAS_BASICAS else "Análisis avanzado"
     
-    def mostrar_resultados_basicos(self, f, f_prime, puntos_criticos, x):
+    def mostrar_rendimiento(self):
+        """Muestra en su pestaña el tiempo, tamaño y uso de cache de cada etapa"""
+        self.text_performance.delete(1.0, tk.END)
+        if not self.informes:
+            self.text_performance.insert(tk.END, "Aún no se ha hecho ningún cálculo\n")
+            return
+        for nombre in ("Análisis básico", "Análisis avanzado", "Interfaz"):
+            informe = self.informes.get(nombre)
+            if informe is None or not informe.etapas:
+                continue
+            self.text_performance.insert(tk.END, f"{nombre.upper()}:\n", "titulo")
+            self.text_performance.insert(tk.END, informe.resumen() + "\n\n")
+    
+    def cancelar(self):
+        """Cancela el cálculo en curso, si lo hay"""
+        if self.cancelacion is not None:
+            self.cancelacion.set()
+            self.label_estado.config(text="Cancelando...")
+    
+    def mensaje_etapa(self, nombre, resultado):
+        """Texto a mostrar en lugar de una etapa sin resultado, o None si ya está disponible"""
+        if nombre in resultado.etapas_agotadas:
+            return MENSAJE_TIEMPO_AGOTADO
+        if nombre in resultado.errores_etapa:
+            return f"No disponible: {resultado.errores_etapa[nombre]}"
+        if nombre not in self.etapas_listas:
+            if nombre in ETAPAS_AVANZADAS and self.estado_avanzado is None:
+                if self.analisis_cancelado:
+                    return "Cancelado"
+                return (MENSAJE_AVANZADO_AL_ESCRIBIR if self.analisis_automatico
+                        else MENSAJE_AVANZADO_PENDIENTE)
+            return "Cancelado" if self.analisis_cancelado else "Calculando..."
+        return None
+    
+    def mostrar_resultados_basicos(self, resultado):
         """Muestra resultados básicos en la primera pestaña"""
         self.text_basic.delete(1.0, tk.END)
         
         # Función original
         self.text_basic.insert(tk.END, "FUNCIÓN ANALIZADA:\n", "titulo")
-        self.text_basic.insert(tk.END, f"f(x) = {sp.pretty(f, use_unicode=True)}\n\n")
+        self.text_basic.insert(tk.END, f"f(x) = {sp.pretty(resultado.funcion, use_unicode=True)}\n\n")
         
         # Derivada
         self.text_basic.insert(tk.END, "DERIVADA PRIMERA:\n", "titulo")
-        self.text_basic.insert(tk.END, f"f'(x) = {sp.pretty(f_prime, use_unicode=True)}\n\n")
+        mensaje = self.mensaje_etapa('derivada', resultado)
+        if mensaje or resultado.derivada is None:
+            self.text_basic.insert(tk.END, f"{mensaje or MENSAJE_TIEMPO_AGOTADO}\n\n")
+        else:
+            self.text_basic.insert(tk.END, f"f'(x) = {sp.pretty(resultado.derivada, use_unicode=True)}\n\n")
         
         # Puntos críticos
         self.text_basic.insert(tk.END, "PUNTOS CRÍTICOS:\n", "titulo")
-        if puntos_criticos:
-            for punto, tipo in puntos_criticos:
-                y_val = f.subs(x, punto)
+        mensaje = self.mensaje_etapa('puntos_criticos', resultado)
+        if mensaje:
+            self.text_basic.insert(tk.END, f"{mensaje}\n")
+        elif resultado.puntos_criticos:
+            for punto, y_val, tipo in resultado.puntos_criticos:
+                valor = f"{y_val:.4f}" if y_val is not None else "?"
                 self.text_basic.insert(tk.END, 
-                    f"• x = {punto:.4f}, f(x) = {float(y_val):.4f} → {tipo}\n", "resultado")
+                    f"• x = {punto:.4f}, f(x) = {valor} → {tipo}\n", "resultado")
+            mensaje = self.mensaje_etapa('clasificacion', resultado)
+            if mensaje:
+                self.text_basic.insert(tk.END, f"Clasificación: {mensaje}\n")
+        elif resultado.derivada is None:
+            self.text_basic.insert(tk.END, f"{MENSAJE_TIEMPO_AGOTADO}\n")
         else:
             self.text_basic.insert(tk.END, "No se encontraron puntos críticos\n")
         
         # Segunda derivada
-        f_double_prime = sp.diff(f_prime, x)
+        f_double_prime = resultado.segunda_derivada
         self.text_basic.insert(tk.END, "\nDERIVADA SEGUNDA:\n", "titulo")
+        mensaje = self.mensaje_etapa('segunda_derivada', resultado)
+        if mensaje or f_double_prime is None:
+            self.text_basic.insert(tk.END, f"{mensaje or MENSAJE_TIEMPO_AGOTADO}\n\n")
+            return
         self.text_basic.insert(tk.END, f"f''(x) = {sp.pretty(f_double_prime, use_unicode=True)}\n\n")
         
         # Información sobre concavidad
@@ -393,63 +601,68 @@ class CalculadoraCalculo:
         except:
             self.text_basic.insert(tk.END, "No se pudo determinar la concavidad\n")
     
-    def mostrar_resultados_avanzados(self, f, x):
+    def mostrar_resultados_avanzados(self, resultado):
         """Muestra resultados avanzados en la segunda pestaña"""
         self.text_advanced.delete(1.0, tk.END)
         
         # Integral
         self.text_advanced.insert(tk.END, "INTEGRAL INDEFINIDA:\n", "titulo")
-        integral = calcular_integral(f, x)
-        self.text_advanced.insert(tk.END, f"∫ f(x) dx = {sp.pretty(integral, use_unicode=True)}\n\n", "resultado")
+        mensaje = self.mensaje_etapa('integral', resultado)
+        if mensaje:
+            self.text_advanced.insert(tk.END, f"{mensaje}\n\n", "resultado")
+        else:
+            self.text_advanced.insert(tk.END, f"∫ f(x) dx = {sp.pretty(resultado.integral, use_unicode=True)}\n\n", "resultado")
         
         # Serie de Taylor
         self.text_advanced.insert(tk.END, "SERIE DE TAYLOR (alrededor de x=0):\n", "titulo")
-        taylor = calcular_taylor(f, x)
-        self.text_advanced.insert(tk.END, f"{sp.pretty(taylor, use_unicode=True)}\n\n", "resultado")
+        mensaje = self.mensaje_etapa('taylor', resultado)
+        if mensaje:
+            self.text_advanced.insert(tk.END, f"{mensaje}\n\n", "resultado")
+        else:
+            self.text_advanced.insert(tk.END, f"{sp.pretty(resultado.taylor, use_unicode=True)}\n\n", "resultado")
         
         # Límites
         self.text_advanced.insert(tk.END, "LÍMITES:\n", "titulo")
-        try:
-            lim_inf_pos = sp.limit(f, x, oo)
-            lim_inf_neg = sp.limit(f, x, -oo)
+        lim_inf_pos, lim_inf_neg = resultado.limite_mas_infinito, resultado.limite_menos_infinito
+        mensaje = self.mensaje_etapa('limites', resultado)
+        if mensaje:
+            self.text_advanced.insert(tk.END, f"{mensaje}\n\n")
+        elif lim_inf_pos is not None:
             self.text_advanced.insert(tk.END, f"Límite cuando x → +∞: {sp.pretty(lim_inf_pos, use_unicode=True)}\n", "resultado")
             self.text_advanced.insert(tk.END, f"Límite cuando x → -∞: {sp.pretty(lim_inf_neg, use_unicode=True)}\n\n", "resultado")
-        except:
+        else:
             self.text_advanced.insert(tk.END, "Límites no disponibles\n\n")
         
         # Información del dominio
         self.text_advanced.insert(tk.END, "INFORMACIÓN DEL DOMINIO:\n", "titulo")
-        try:
-            # Buscar puntos donde la función no está definida
-            singularidades = sp.singularities(f, x)
-            if singularites:
-                self.text_advanced.insert(tk.END, f"Puntos singulares: {singularities}\n", "resultado")
-            else:
-                self.text_advanced.insert(tk.END, "La función parece estar definida para todos los reales\n", "resultado")
-        except:
+        # Puntos donde la función no está definida
+        singularidades = resultado.singularidades
+        mensaje = self.mensaje_etapa('dominio', resultado)
+        if mensaje:
+            self.text_advanced.insert(tk.END, f"{mensaje}\n", "resultado")
+        elif singularidades is None:
             self.text_advanced.insert(tk.END, "No se pudo analizar el dominio completamente\n", "resultado")
+        elif singularidades:
+            self.text_advanced.insert(tk.END, f"Puntos singulares: {singularidades}\n", "resultado")
+        else:
+            self.text_advanced.insert(tk.END, "La función parece estar definida para todos los reales\n", "resultado")
     
     def limpiar(self):
         """Limpia todos los campos"""
+        self.cancelar_pendiente()
+        self.cancelar()
+        self.ultimo_texto = None
+        self.resultado = None
         self.entry_func.delete(0, tk.END)
         self.text_basic.delete(1.0, tk.END)
         self.text_advanced.delete(1.0, tk.END)
+        self.informes = {}
+        self.text_performance.delete(1.0, tk.END)
+        if self._grafica is not None:
+            self._grafica.limpiar()
     
     def mostrar_ejemplos(self):
         """Muestra ejemplos de funciones"""
-        ejemplos = [
-            "x^2 + 2*x + 1",
-            "x^3 - 3*x",
-            "sin(x)",
-            "cos(x)",
-            "exp(x)",
-            "log(x + 1)",
-            "1/(x^2 + 1)",
-            "sqrt(x^2 + 1)",
-            "x*sin(x)",
-            "exp(-x^2)"
-        ]
-        
         # Crear ventana de ejemplos
         ejemplos_window = tk.Toplevel(self.root)
         ejemplos_window.title("Ejemplos de Funciones")
@@ -458,7 +671,7 @@ class CalculadoraCalculo:
         tk.Label(ejemplos_window, text="Selecciona un ejemplo:", 
                 font=("Arial", 11, "bold")).pack(pady=10)
         
-        for ejemplo in ejemplos:
+        for ejemplo in EJEMPLOS:
             def make_lambda(ej=ejemplo):
                 return lambda: self.seleccionar_ejemplo(ej, ejemplos_window)
             
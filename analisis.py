@@ -0,0 +1,1036 @@
+"""
+Motor de análisis sin interfaz gráfica.
+
+Contiene las funciones de cálculo usadas por Programa_Graficador_2.py y un
+punto de entrada por lotes que analiza muchas funciones y emite JSON Lines:
+
+    python analisis.py funciones.txt > resultados.jsonl
+    cat funciones.txt | python analisis.py
+    python analisis.py funciones.txt -p 0 --limite 30   # todos los núcleos
+    python analisis.py funciones.txt --eventos          # una línea por etapa
+    python analisis.py funciones.txt --perfil --metricas metricas.prom
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import numpy as np
+import sympy as sp
+from sympy import oo
+import warnings
+warnings.filterwarnings('ignore')
+
+from cache import CacheLRU
+from etapas import ETAPAS, ETAPAS_BASICAS
+from expresiones import parsear
+from muestreo import muestrear_adaptativo
+from numerico import compilar, evaluar
+from raices import buscar_raices
+from rendimiento import Rendimiento, metricas_prometheus
+
+# Versión de los resultados que se guardan en el cache; hay que subirla al
+# cambiar lo que devuelve alguna etapa, para no leer de disco los anteriores
+VERSION_CACHE = 1
+
+# Cache de resultados compartido por todos los análisis de este proceso
+CACHE = CacheLRU(version=VERSION_CACHE)
+_NO_ENCONTRADO = object()
+
+# Puntos de malla que debe haber entre dos puntos críticos numéricos consecutivos
+PUNTOS_ENTRE_CRITICOS = 8
+# Malla más fina con la que se buscan; si no alcanza, la búsqueda está incompleta
+MAX_MUESTRAS_CRITICOS = 200_001
+
+def configurar_cache(max_tamano=4096, ttl=None, ruta=None):
+    """Reemplaza el cache global; con ruta se persiste en un archivo SQLite"""
+    global CACHE
+    CACHE = CacheLRU(max_tamano=max_tamano, ttl=ttl, ruta=ruta, version=VERSION_CACHE)
+    return CACHE
+
+# ==================== DERIVADAS COMPARTIDAS ====================
+
+class CadenaDerivadas:
+    """Derivadas sucesivas f, f', f'', ... calculadas una sola vez y bajo demanda"""
+
+    def __init__(self, f, x):
+        self.f = f
+        self.x = x
+        self._derivadas = [f]
+        self._candado = threading.Lock()
+
+    def derivada(self, orden=1):
+        """Devuelve la derivada de orden dado, calculando solo las que falten"""
+        with self._candado:
+            while len(self._derivadas) <= orden:
+                self._derivadas.append(sp.diff(self._derivadas[-1], self.x))
+            return self._derivadas[orden]
+
+@lru_cache(maxsize=128)
+def obtener_derivadas(f, x):
+    """Devuelve la cadena de derivadas de f, compartida por todo el análisis"""
+    return CadenaDerivadas(f, x)
+
+def compilar_derivada(f, x, orden=1):
+    """Devuelve la función numérica compilada de la derivada de orden dado"""
+    return compilar(obtener_derivadas(f, x).derivada(orden), x)
+
+# ==================== FUNCIONES DE VALIDACIÓN Y CÁLCULO ====================
+
+def validar_funcion(expr):
+    """Valida que la función sea correcta"""
+    try:
+        x = sp.Symbol('x')
+        f = parsear(expr)
+        # Verificar que dependa de x
+        if x not in f.free_symbols:
+            raise ValueError("La función debe depender de la variable x")
+        return f
+    except Exception as e:
+        raise ValueError(f"Función inválida: {e}")
+
+def formatear_funcion(expr):
+    """Convierte una expresión sympy a formato legible"""
+    try:
+        x = sp.Symbol('x')
+        expr_sym = parsear(expr)
+
+        # Convertir a LaTeX para mejor visualización
+        try:
+            expr_str = sp.latex(expr_sym)
+        except:
+            expr_str = str(expr_sym)
+
+        # Reemplazos para mejor legibilidad
+        reemplazos = {
+            '**': '^',
+            'sin': 'sen',
+            'asin': 'arcsen',
+            'acos': 'arccos',
+            'atan': 'arctan'
+        }
+
+        for viejo, nuevo in reemplazos.items():
+            expr_str = expr_str.replace(viejo, nuevo)
+
+        return expr_str, expr_sym
+    except Exception as e:
+        raise ValueError(f"Error al procesar la expresión: {e}")
+
+@lru_cache(maxsize=128)
+def coeficientes_polinomio(f, x):
+    """Devuelve los coeficientes numéricos de f si es un polinomio en x, si no None"""
+    try:
+        if not f.is_polynomial(x):
+            return None
+        return np.array([float(c) for c in sp.Poly(f, x).all_coeffs()])
+    except Exception:
+        return None
+
+def _puntos_criticos_polinomio(f, x):
+    """Raíces reales de f' por la matriz compañera, sin pasar por sp.solve"""
+    derivada = sp.Poly(f, x).diff(x)
+    if derivada.is_zero:
+        return []
+    # Con coeficientes exactos se quitan las raíces repetidas, que numpy.roots
+    # calcula con poca precisión; el criterio de orden superior las clasifica
+    if derivada.domain.is_ZZ or derivada.domain.is_QQ:
+        derivada = derivada.sqf_part()
+    coeficientes = np.array([float(c) for c in derivada.all_coeffs()])
+    if coeficientes.size < 2:
+        return []
+
+    raices = np.roots(coeficientes)
+    reales = raices[np.abs(raices.imag) <= 1e-8 * np.maximum(1.0, np.abs(raices))].real
+
+    # Pulir con un par de pasos de Newton sobre el polinomio
+    derivada_coef = np.polyder(coeficientes)
+    with np.errstate(all='ignore'):
+        for _ in range(2):
+            paso = np.polyval(coeficientes, reales) / np.polyval(derivada_coef, reales)
+            reales = np.where(np.isfinite(paso), reales - paso, reales)
+
+    puntos = []
+    for valor in np.sort(reales):
+        if not puntos or abs(valor - puntos[-1][0]) >= 1e-5:
+            puntos.append((float(valor), 'polinomio'))
+    return puntos
+
+def encontrar_puntos_criticos(f, x):
+    """Encuentra puntos críticos de manera más robusta"""
+    if coeficientes_polinomio(f, x) is not None:
+        return _puntos_criticos_polinomio(f, x)
+
+    f_prime = obtener_derivadas(f, x).derivada(1)
+
+    # Resolver ecuación derivada = 0
+    try:
+        critical_points = sp.solve(sp.Eq(f_prime, 0), x)
+    except:
+        critical_points = []
+
+    # Filtrar solo puntos reales y eliminar duplicados
+    puntos_reales = []
+    for punto in critical_points:
+        if punto.is_real:
+            try:
+                valor = float(punto)
+                # Evitar duplicados
+                if not any(abs(valor - p[0]) < 1e-5 for p in puntos_reales):
+                    puntos_reales.append((valor, 'derivada_cero'))
+            except:
+                continue
+
+    # Si sympy no pudo resolver (p. ej. sin(x) + x*cos(x) = 0), buscar
+    # numéricamente en el mismo intervalo que se va a graficar
+    if not puntos_reales:
+        x_min, x_max = determinar_rango_optimo(f, [], x)
+        puntos_reales = encontrar_puntos_criticos_numericos(f, x, x_min, x_max)
+
+    return puntos_reales
+
+def encontrar_puntos_criticos_numericos(f, x, x_min, x_max, muestras=2000):
+    """
+    Busca los ceros de f' en [x_min, x_max] de forma numérica con raices.buscar_raices.
+
+    f'' se usa para refinar con Newton y para encontrar los ceros de f' que no
+    cambian de signo. La malla se afina según lo que oscile f': se repite la
+    búsqueda hasta que entre cada dos ceros consecutivos caben al menos
+    PUNTOS_ENTRE_CRITICOS puntos. Si para eso harían falta más de
+    MAX_MUESTRAS_CRITICOS puntos se lanza ValueError, porque la lista estaría
+    incompleta. Si las derivadas no se pueden compilar o evaluar con NumPy, o
+    f' se anula en todo el rango, devuelve [].
+    """
+    while True:
+        try:
+            raices = buscar_raices(compilar_derivada(f, x, 1), x_min, x_max,
+                                   derivada=compilar_derivada(f, x, 2), puntos=muestras,
+                                   decimales=10)
+            # Descartar los ceros de f' donde f no está definida
+            raices = raices[np.isfinite(evaluar(compilar(f, x), raices))]
+        except Exception:
+            # lambdify no traduce todas las derivadas (abs, sign, floor, re, ...),
+            # algunas funciones compiladas no aceptan arreglos (gamma, erf, ...) y
+            # buscar_raices rechaza una f' que vale cero en toda la malla
+            return []
+
+        # Con ceros a pocos pasos de malla unos de otros puede haber otros entre
+        # medias que la malla no ve (sin(x**3) cerca de x = 10)
+        paso = (x_max - x_min) / (muestras - 1)
+        separacion = np.diff(raices).min() if raices.size > 1 else np.inf
+        if separacion >= PUNTOS_ENTRE_CRITICOS * paso:
+            break
+        if muestras >= MAX_MUESTRAS_CRITICOS:
+            raise ValueError(f"f' oscila demasiado rápido para encontrar todos los puntos "
+                             f"críticos en [{x_min:g}, {x_max:g}]")
+        necesarias = math.ceil((x_max - x_min) / separacion * PUNTOS_ENTRE_CRITICOS) + 1
+        muestras = min(MAX_MUESTRAS_CRITICOS, max(2 * muestras, necesarias))
+
+    puntos = []
+    for valor in raices:
+        if not puntos or abs(valor - puntos[-1][0]) >= 1e-5:
+            puntos.append((float(valor), 'numerico'))
+    return puntos
+
+def clasificar_punto_critico(f, x, punto):
+    """Clasifica un punto crítico de manera más precisa"""
+    f_double_prime = obtener_derivadas(f, x).derivada(2)
+
+    try:
+        seg_derivada = f_double_prime.subs(x, punto)
+        if seg_derivada > 0:
+            return "mínimo"
+        elif seg_derivada < 0:
+            return "máximo"
+        else:
+            # Usar criterio de mayor orden
+            return "posible punto de inflexión"
+    except:
+        return "indeterminado"
+
+# Tipo de dato de la tabla de puntos críticos clasificados
+TIPO_PUNTO_CRITICO = np.dtype([('x', float), ('y', float), ('tipo', 'U26')])
+
+def clasificar_puntos_criticos(f, x, puntos, max_orden=8, tolerancia=1e-9):
+    """
+    Clasifica varios puntos críticos a la vez evaluando f y sus derivadas con NumPy.
+
+    Devuelve un arreglo estructurado con campos x, y, tipo. Donde f'' se anula
+    se aplica el criterio de orden superior: si la primera derivada no nula es
+    de orden par el punto es extremo, si es impar es punto de inflexión.
+    """
+    xs = np.asarray(puntos, dtype=float).ravel()
+    tabla = np.empty(xs.size, dtype=TIPO_PUNTO_CRITICO)
+    tabla['x'] = xs
+    tabla['tipo'] = "indeterminado"
+    if xs.size == 0:
+        return tabla
+
+    # Los polinomios se evalúan con numpy.polyval sin compilar nada
+    coeficientes = coeficientes_polinomio(f, x)
+    if coeficientes is not None:
+        def evaluar_orden(orden, valores):
+            return np.polyval(np.polyder(coeficientes, orden), valores)
+    else:
+        def evaluar_orden(orden, valores):
+            try:
+                funcion = compilar(f, x) if orden == 0 else compilar_derivada(f, x, orden)
+                return evaluar(funcion, valores)
+            except Exception:
+                # NumPy no evalúa Max, Heaviside ni expresiones con otros símbolos
+                # libres; esos puntos quedan indeterminados, como en clasificar_punto_critico
+                return np.full(valores.shape, np.nan)
+
+    with np.errstate(all='ignore'):
+        tabla['y'] = evaluar_orden(0, xs)
+
+        pendientes = np.arange(xs.size)
+        for orden in range(2, max_orden + 1):
+            if pendientes.size == 0:
+                break
+            valores = evaluar_orden(orden, xs[pendientes])
+            decisivos = np.isfinite(valores) & (np.abs(valores) > tolerancia)
+            indices = pendientes[decisivos]
+            if orden % 2 == 0:
+                tabla['tipo'][indices] = np.where(valores[decisivos] > 0, "mínimo", "máximo")
+            else:
+                tabla['tipo'][indices] = "punto de inflexión"
+            # Los valores no finitos quedan como indeterminados
+            pendientes = pendientes[np.isfinite(valores) & ~decisivos]
+
+    return tabla
+
+def determinar_rango_optimo(f, critical_points, x):
+    """Determina el rango óptimo para la gráfica"""
+    if critical_points:
+        puntos_x = [p[0] for p in critical_points]
+        x_min = min(puntos_x) - 3
+        x_max = max(puntos_x) + 3
+    else:
+        # Evaluar la función en algunos puntos para determinar comportamiento
+        try:
+            # Probar diferentes rangos para ver dónde está definida la función
+            test_points = np.linspace(-10, 10, 50)
+            f_lamb = compilar(f, x)
+            y_test = f_lamb(test_points)
+            defined_points = test_points[np.isfinite(y_test)]
+            if len(defined_points) > 0:
+                x_min = max(-10, np.min(defined_points) - 2)
+                x_max = min(10, np.max(defined_points) + 2)
+            else:
+                x_min, x_max = -5, 5
+        except:
+            x_min, x_max = -5, 5
+
+    # Asegurar un rango mínimo
+    if x_max - x_min < 4:
+        center = (x_min + x_max) / 2
+        x_min = center - 2
+        x_max = center + 2
+
+    return x_min, x_max
+
+def calcular_integral(f, x):
+    """Calcula la integral indefinida"""
+    try:
+        return sp.integrate(f, x)
+    except:
+        return "No se pudo calcular la integral"
+
+def calcular_taylor(f, x, punto=0, orden=5):
+    """Calcula serie de Taylor alrededor de un punto"""
+    try:
+        return sp.series(f, x, punto, orden).removeO()
+    except:
+        return "No se pudo calcular la serie de Taylor"
+
+def calcular_limites(f, x):
+    """Calcula los límites de la función cuando x → +∞ y x → -∞"""
+    try:
+        return sp.limit(f, x, oo), sp.limit(f, x, -oo)
+    except:
+        return None, None
+
+def calcular_singularidades(f, x):
+    """Busca los puntos donde la función no está definida"""
+    try:
+        return sp.singularities(f, x)
+    except:
+        return None
+
+# ==================== VISTA PREVIA ====================
+
+def vista_previa(expr, max_puntos=400):
+    """
+    Etapas baratas del análisis, para mostrar la curva mientras se escribe.
+
+    Solo interpreta la función (compartiendo el cache de la etapa de parseo),
+    la compila y la muestrea; no deriva ni resuelve nada. Devuelve (f, xs, ys)
+    y lanza ValueError si la expresión todavía no es válida.
+    """
+    clave = f"parseo:{expr}"
+    f = CACHE.obtener(clave, _NO_ENCONTRADO)
+    if f is _NO_ENCONTRADO:
+        f = validar_funcion(expr)
+        CACHE.guardar(clave, f)
+    x = sp.Symbol('x')
+    if f.free_symbols - {x}:
+        raise ValueError("Función inválida: solo puede depender de x")
+    x_min, x_max = determinar_rango_optimo(f, [], x)
+    xs, ys = muestrear_adaptativo(compilar(f, x), x_min, x_max, max_puntos=max_puntos)
+    return f, xs, ys
+
+# ==================== LÍMITES DE TIEMPO Y CANCELACIÓN ====================
+
+# Cada cuánto se comprueba si una etapa debe detenerse (segundos)
+INTERVALO_SONDEO = 0.05
+
+class EtapaInterrumpida(Exception):
+    """Una etapa del análisis se detuvo antes de terminar"""
+
+class TiempoAgotado(EtapaInterrumpida):
+    """La etapa excedió su tiempo máximo"""
+
+class Cancelado(EtapaInterrumpida):
+    """El análisis fue cancelado"""
+
+class _Interrupcion(BaseException):
+    """Se lanza dentro de sympy; no hereda de Exception para que no la atrapen sus except"""
+
+def ejecutar_con_limite(funcion, *args, limite=None, cancelacion=None):
+    """
+    Ejecuta funcion(*args) con un tiempo máximo y cancelación cooperativa.
+
+    En el hilo principal de Unix se interrumpe el cálculo con SIGALRM, lo que
+    funciona aun dentro de sympy. En otros hilos el cálculo corre en un hilo
+    auxiliar que se abandona al vencer el tiempo (sigue ocupando CPU hasta
+    terminar, pero su resultado se descarta). Lanza TiempoAgotado o Cancelado.
+    """
+    if limite is None and cancelacion is None:
+        return funcion(*args)
+    if cancelacion is not None and cancelacion.is_set():
+        raise Cancelado("Análisis cancelado")
+
+    fecha_limite = time.monotonic() + limite if limite is not None else None
+    if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+        return _ejecutar_con_senal(funcion, args, fecha_limite, cancelacion)
+    return _ejecutar_en_hilo(funcion, args, fecha_limite, cancelacion)
+
+def _motivo_para_detener(fecha_limite, cancelacion):
+    """Devuelve la excepción que corresponde si la etapa debe detenerse"""
+    if cancelacion is not None and cancelacion.is_set():
+        return Cancelado("Análisis cancelado")
+    if fecha_limite is not None and time.monotonic() >= fecha_limite:
+        return TiempoAgotado("Tiempo agotado")
+    return None
+
+def _ejecutar_con_senal(funcion, args, fecha_limite, cancelacion):
+    """Interrumpe la función desde un temporizador SIGALRM periódico"""
+    motivo = []
+
+    def sondear(signum, frame):
+        detener = _motivo_para_detener(fecha_limite, cancelacion)
+        if detener is not None:
+            motivo.append(detener)
+            raise _Interrupcion()
+
+    anterior = signal.signal(signal.SIGALRM, sondear)
+    signal.setitimer(signal.ITIMER_REAL, INTERVALO_SONDEO, INTERVALO_SONDEO)
+    try:
+        valor = funcion(*args)
+    except _Interrupcion:
+        valor = None
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, anterior)
+
+    # La interrupción pudo quedar atrapada en un except de la propia función
+    if motivo:
+        raise motivo[0]
+    return valor
+
+def _ejecutar_en_hilo(funcion, args, fecha_limite, cancelacion):
+    """Ejecuta la función en un hilo auxiliar que se abandona si hay que detenerla"""
+    salida = {}
+
+    def objetivo():
+        try:
+            salida['valor'] = funcion(*args)
+        except BaseException as e:
+            salida['error'] = e
+
+    hilo = threading.Thread(target=objetivo, daemon=True)
+    hilo.start()
+    while True:
+        hilo.join(INTERVALO_SONDEO)
+        if not hilo.is_alive():
+            break
+        detener = _motivo_para_detener(fecha_limite, cancelacion)
+        if detener is not None:
+            raise detener
+
+    if 'error' in salida:
+        raise salida['error']
+    return salida['valor']
+
+# ==================== MOTOR DE ANÁLISIS ====================
+
+@dataclass
+class Resultado:
+    """Resultado del análisis completo de una función"""
+    entrada: str
+    funcion: object = None
+    derivada: object = None
+    segunda_derivada: object = None
+    puntos_criticos: list = field(default_factory=list)
+    integral: object = None
+    taylor: object = None
+    limite_mas_infinito: object = None
+    limite_menos_infinito: object = None
+    singularidades: object = None
+    etapas_agotadas: list = field(default_factory=list)
+    errores_etapa: dict = field(default_factory=dict)
+    error: str = None
+    tiempo: float = 0.0
+    rendimiento: Rendimiento = None
+
+    def a_dict(self):
+        """Convierte el resultado a un diccionario serializable en JSON"""
+        def texto(valor):
+            return None if valor is None else str(valor)
+
+        def numero(valor):
+            return valor if valor is not None and math.isfinite(valor) else None
+
+        return {
+            'entrada': self.entrada,
+            'funcion': texto(self.funcion),
+            'derivada': texto(self.derivada),
+            'segunda_derivada': texto(self.segunda_derivada),
+            'puntos_criticos': [
+                {'x': numero(punto), 'y': numero(y), 'tipo': tipo}
+                for punto, y, tipo in self.puntos_criticos
+            ],
+            'integral': texto(self.integral),
+            'taylor': texto(self.taylor),
+            'limite_mas_infinito': texto(self.limite_mas_infinito),
+            'limite_menos_infinito': texto(self.limite_menos_infinito),
+            'singularidades': texto(self.singularidades),
+            'etapas_agotadas': list(self.etapas_agotadas),
+            'errores_etapa': dict(self.errores_etapa),
+            'error': self.error,
+            'tiempo': round(self.tiempo, 6),
+            'rendimiento': self.rendimiento.a_dict() if self.rendimiento is not None else None,
+        }
+
+def _clasificar_puntos(f, x, puntos):
+    """Calcula el valor y la clasificación de cada punto crítico"""
+    tabla = clasificar_puntos_criticos(f, x, [punto for punto, _ in puntos])
+    return [(float(fila['x']), float(fila['y']) if np.isfinite(fila['y']) else None, str(fila['tipo']))
+            for fila in tabla]
+
+# Campos del Resultado que produce cada etapa
+CAMPOS_ETAPA = {
+    'parseo': ('funcion',),
+    'derivada': ('derivada',),
+    'puntos_criticos': ('puntos_criticos',),
+    'clasificacion': ('puntos_criticos',),
+    'segunda_derivada': ('segunda_derivada',),
+    'integral': ('integral',),
+    'taylor': ('taylor',),
+    'limites': ('limite_mas_infinito', 'limite_menos_infinito'),
+    'dominio': ('singularidades',),
+}
+
+@dataclass
+class EventoEtapa:
+    """
+    Aviso de que una etapa del análisis terminó.
+
+    estado es 'completa', 'cache' (tomada del cache), 'agotada', 'omitida'
+    (faltaba una etapa previa) o 'error'. El último evento de cada análisis
+    tiene etapa 'fin' y lleva el resultado completo. medicion tiene el tiempo
+    de CPU, el tamaño de la expresión y demás datos de rendimiento de la etapa.
+    """
+    etapa: str
+    estado: str
+    resultado: Resultado
+    tiempo: float = 0.0
+    medicion: object = None
+
+    def a_dict(self):
+        """Convierte el evento a un diccionario serializable en JSON"""
+        datos = self.resultado.a_dict()
+        evento = {'entrada': self.resultado.entrada, 'etapa': self.etapa,
+                  'estado': self.estado, 'tiempo': round(self.tiempo, 6)}
+        if self.etapa == 'fin':
+            evento.update(datos)
+        else:
+            evento.update({campo: datos[campo] for campo in CAMPOS_ETAPA[self.etapa]})
+            if self.medicion is not None:
+                evento['rendimiento'] = self.medicion.a_dict()
+        return evento
+
+def _con_dependencias(etapas):
+    """Conjunto de etapas a ejecutar: las pedidas, el parseo y aquellas de las que dependen"""
+    pedidas = set(etapas) | {'parseo'}
+    if 'clasificacion' in pedidas:
+        pedidas.add('puntos_criticos')
+    if pedidas & {'puntos_criticos', 'segunda_derivada'}:
+        pedidas.add('derivada')
+    return pedidas
+
+def analizar_por_etapas(expr, limite=None, cancelacion=None, etapas=ETAPAS, perfilar=False,
+                        memoria=False):
+    """
+    Analiza una función produciendo un EventoEtapa en cuanto termina cada etapa.
+
+    Todos los eventos comparten el mismo Resultado, que se va completando.
+    limite es el tiempo máximo en segundos de cada etapa (un número, o un
+    diccionario {etapa: segundos} con los nombres de ETAPAS). Las etapas que
+    lo exceden quedan en resultado.etapas_agotadas y el análisis continúa con
+    las siguientes; lo mismo ocurre con las que fallan, cuyo mensaje queda en
+    resultado.errores_etapa. cancelacion es un threading.Event que detiene
+    el análisis.
+    etapas limita el análisis a esas etapas (más el parseo y las etapas de
+    las que dependen); las demás no se calculan ni producen eventos.
+    Cada etapa se mide en resultado.rendimiento; perfilar y memoria agregan
+    el perfil de cProfile y el pico de memoria (ver rendimiento.Rendimiento).
+    """
+    inicio = time.perf_counter()
+    rendimiento = Rendimiento(perfilar=perfilar, memoria=memoria)
+    resultado = Resultado(entrada=expr, rendimiento=rendimiento)
+    x = sp.Symbol('x')
+    ultima = {}
+    pedidas = _con_dependencias(etapas)
+
+    def etapa(nombre, funcion, *args, clave=None):
+        """Ejecuta una etapa (o la toma del cache) y devuelve None si se agota su tiempo o falla"""
+        medicion = ultima['medicion'] = rendimiento.iniciar(nombre)
+        ultima['estado'] = 'completa'
+        if clave is not None:
+            clave = f"{nombre}:{clave}"
+            valor = CACHE.obtener(clave, _NO_ENCONTRADO)
+            if valor is not _NO_ENCONTRADO:
+                ultima['estado'] = 'cache'
+                return valor
+
+        segundos = limite.get(nombre) if isinstance(limite, dict) else limite
+        try:
+            valor = ejecutar_con_limite(rendimiento.instrumentar(funcion, medicion), *args,
+                                        limite=segundos, cancelacion=cancelacion)
+        except TiempoAgotado:
+            resultado.etapas_agotadas.append(nombre)
+            ultima['estado'] = 'agotada'
+            return None
+        except Cancelado:
+            raise
+        except Exception as e:
+            # Un error en una etapa no detiene las demás ni el resto del lote
+            resultado.errores_etapa[nombre] = str(e) or type(e).__name__
+            ultima['estado'] = 'error'
+            return None
+
+        if clave is not None:
+            CACHE.guardar(clave, valor)
+        return valor
+
+    def evento(nombre):
+        valor = [getattr(resultado, campo) for campo in CAMPOS_ETAPA[nombre]]
+        medicion = rendimiento.terminar(ultima['medicion'], ultima['estado'], valor)
+        return EventoEtapa(nombre, ultima['estado'], resultado, medicion.tiempo, medicion)
+
+    def omitidas(*nombres):
+        return [EventoEtapa(nombre, 'omitida', resultado) for nombre in nombres]
+
+    estado_final = 'completa'
+    try:
+        f = etapa('parseo', validar_funcion, expr, clave=expr)
+        if 'parseo' in resultado.errores_etapa:
+            # Sin función no hay análisis: el error del parseo es el del resultado
+            resultado.error = resultado.errores_etapa.pop('parseo')
+            estado_final = 'error'
+        elif f is None:
+            resultado.error = "Tiempo agotado al interpretar la función"
+        resultado.funcion = f
+        yield evento('parseo')
+
+        if f is not None:
+            # La forma canónica de sympy identifica la función aunque se haya
+            # escrito distinto (x^2 y x**2 comparten resultados)
+            canonica = sp.srepr(f)
+            derivadas = obtener_derivadas(f, x)
+            if 'derivada' in pedidas:
+                resultado.derivada = etapa('derivada', derivadas.derivada, 1, clave=canonica)
+                yield evento('derivada')
+
+            # Puntos críticos con su valor y clasificación
+            if 'puntos_criticos' in pedidas and resultado.derivada is None:
+                yield from omitidas(*[nombre for nombre in ('puntos_criticos', 'clasificacion')
+                                      if nombre in pedidas])
+            elif 'puntos_criticos' in pedidas:
+                puntos = etapa('puntos_criticos', encontrar_puntos_criticos, f, x, clave=canonica)
+                if puntos:
+                    resultado.puntos_criticos = [(punto, None, "indeterminado") for punto, _ in puntos]
+                yield evento('puntos_criticos')
+                if 'clasificacion' in pedidas and puntos:
+                    clasificados = etapa('clasificacion', _clasificar_puntos, f, x, puntos,
+                                         clave=canonica)
+                    if clasificados is not None:
+                        resultado.puntos_criticos = clasificados
+                    yield evento('clasificacion')
+                elif 'clasificacion' in pedidas:
+                    yield from omitidas('clasificacion')
+            if 'segunda_derivada' in pedidas:
+                if resultado.derivada is not None:
+                    resultado.segunda_derivada = etapa('segunda_derivada', derivadas.derivada, 2,
+                                                       clave=canonica)
+                    yield evento('segunda_derivada')
+                else:
+                    yield from omitidas('segunda_derivada')
+
+            if 'integral' in pedidas:
+                resultado.integral = etapa('integral', calcular_integral, f, x, clave=canonica)
+                yield evento('integral')
+            if 'taylor' in pedidas:
+                resultado.taylor = etapa('taylor', calcular_taylor, f, x, clave=canonica)
+                yield evento('taylor')
+            if 'limites' in pedidas:
+                limites = etapa('limites', calcular_limites, f, x, clave=canonica)
+                if limites is not None:
+                    resultado.limite_mas_infinito, resultado.limite_menos_infinito = limites
+                yield evento('limites')
+            if 'dominio' in pedidas:
+                resultado.singularidades = etapa('dominio', calcular_singularidades, f, x,
+                                                 clave=canonica)
+                yield evento('dominio')
+    except Cancelado:
+        resultado.error = "Análisis cancelado"
+        estado_final = 'cancelado'
+        rendimiento.terminar(ultima['medicion'], 'cancelada')
+
+    resultado.tiempo = time.perf_counter() - inicio
+    yield EventoEtapa('fin', estado_final, resultado, resultado.tiempo)
+
+def analizar(expr, limite=None, cancelacion=None, etapas=ETAPAS, perfilar=False, memoria=False):
+    """
+    Analiza una función sin interfaz gráfica y devuelve un Resultado.
+
+    Acepta los mismos límites de tiempo, cancelación, selección de etapas y
+    opciones de perfilado que analizar_por_etapas; si algo se interrumpe, el
+    resultado queda parcial.
+    """
+    for evento in analizar_por_etapas(expr, limite=limite, cancelacion=cancelacion,
+                                      etapas=etapas, perfilar=perfilar, memoria=memoria):
+        pass
+    return evento.resultado
+
+def _limpiar_entradas(exprs):
+    """Descarta líneas vacías y comentarios de un iterable de expresiones"""
+    for expr in exprs:
+        expr = expr.strip()
+        if expr and not expr.startswith('#'):
+            yield expr
+
+def analizar_lote(exprs, procesos=1, tam_bloque=8, ordenado=True, limite=None,
+                  limite_etapa=None, etapas=ETAPAS, perfilar=False, memoria=False):
+    """
+    Analiza cada expresión de un iterable y produce sus resultados.
+
+    Con procesos > 1 (o None para usar todos los núcleos) el trabajo se reparte
+    en bloques de tam_bloque expresiones entre varios procesos. Si ordenado es
+    False los resultados se entregan en cuanto terminan. limite es el tiempo
+    máximo en segundos por expresión; un proceso que lo excede se termina.
+    limite_etapa se pasa a analizar() como límite cooperativo de cada etapa,
+    etapas elige qué etapas calcular (por ejemplo ETAPAS_BASICAS) y perfilar
+    y memoria activan el perfil de cada etapa en resultado.rendimiento.
+    """
+    exprs = _limpiar_entradas(exprs)
+    if procesos is None or procesos < 1:
+        procesos = os.cpu_count() or 1
+
+    # Sin límite de tiempo ni paralelismo no hace falta crear procesos
+    if procesos == 1 and limite is None:
+        for expr in exprs:
+            yield analizar(expr, limite=limite_etapa, etapas=etapas, perfilar=perfilar,
+                           memoria=memoria)
+        return
+
+    yield from _analizar_en_paralelo(exprs, procesos, tam_bloque, ordenado, limite, limite_etapa,
+                                     etapas, perfilar, memoria)
+
+# ==================== EJECUCIÓN EN PARALELO ====================
+
+def _trabajador(conexion, configuracion, limite_etapa=None, etapas=ETAPAS, perfilar=False,
+                memoria=False):
+    """
+    Proceso del lote: analiza los bloques que recibe por conexion.
+
+    Por cada bloque (inicio, expresiones) primero avisa (inicio, None) que
+    empezó y luego envía cada (inicio, resultado) en cuanto termina, en orden;
+    así el límite de tiempo se mide por expresión y un bloque interrumpido no
+    pierde los resultados que ya tenía.
+    """
+    # Cada proceso usa un cache con la misma configuración (y el mismo archivo)
+    configurar_cache(*configuracion)
+    try:
+        while True:
+            inicio, bloque = conexion.recv()
+            conexion.send((inicio, None))
+            for expr in bloque:
+                try:
+                    resultado = analizar(expr, limite=limite_etapa, etapas=etapas,
+                                         perfilar=perfilar, memoria=memoria)
+                except Exception as e:
+                    resultado = Resultado(entrada=expr, error=f"Error en el proceso: {e}")
+                conexion.send((inicio, resultado))
+    except (EOFError, KeyboardInterrupt):
+        # El proceso principal cerró la conexión o se interrumpió el lote
+        return
+
+class _Trabajador:
+    """Un proceso del lote, su conexión y el bloque que está analizando"""
+
+    def __init__(self, argumentos):
+        self.conexion, extremo = multiprocessing.Pipe()
+        self.proceso = multiprocessing.Process(target=_trabajador, args=(extremo,) + argumentos,
+                                               daemon=True)
+        self.proceso.start()
+        extremo.close()
+        self.inicio = None
+        self.bloque = None
+        self.recibidos = 0
+        # El reloj empieza cuando el proceso avisa que comenzó el bloque
+        self.fecha = math.inf
+
+    def enviar(self, inicio, bloque):
+        self.inicio, self.bloque, self.recibidos, self.fecha = inicio, bloque, 0, math.inf
+        self.conexion.send((inicio, bloque))
+
+    def libre(self):
+        return self.bloque is None
+
+    def pendientes(self):
+        """(posición, expresiones) de lo que falta del bloque después de la expresión en curso"""
+        return self.inicio + self.recibidos + 1, self.bloque[self.recibidos + 1:]
+
+    def terminar(self):
+        """Detiene el proceso aunque esté ocupado; solo así se corta un cálculo de sympy"""
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+        self.proceso.join(1)
+        self.conexion.close()
+
+def _dividir_en_bloques(exprs, tam_bloque):
+    """Agrupa las expresiones en bloques numerados por su posición inicial"""
+    inicio = 0
+    bloque = []
+    for expr in exprs:
+        bloque.append(expr)
+        if len(bloque) == tam_bloque:
+            yield inicio, bloque
+            inicio += len(bloque)
+            bloque = []
+    if bloque:
+        yield inicio, bloque
+
+def _analizar_en_paralelo(exprs, procesos, tam_bloque, ordenado, limite, limite_etapa, etapas,
+                          perfilar=False, memoria=False):
+    """
+    Reparte los bloques entre procesos y entrega cada resultado al terminar.
+
+    Cada proceso tiene su propia conexión; si una expresión excede el límite
+    (o su proceso muere) solo ese proceso se termina y se reemplaza, y lo que
+    faltaba de su bloque se vuelve a enviar. Los demás siguen trabajando.
+    """
+    bloques = _dividir_en_bloques(exprs, max(1, tam_bloque))
+    argumentos = ((CACHE.max_tamano, CACHE.ttl, CACHE.ruta), limite_etapa, etapas, perfilar,
+                  memoria)
+    reintentos = deque()
+    trabajadores = []
+    terminados = {}  # resultados que esperan su turno en modo ordenado
+    siguiente = 0
+
+    def siguiente_bloque():
+        if reintentos:
+            return reintentos.popleft()
+        return next(bloques, None)
+
+    def recibir(trabajador, entregados):
+        inicio, resultado = trabajador.conexion.recv()
+        trabajador.fecha = time.monotonic() + limite if limite else math.inf
+        if resultado is None:
+            return
+        entregados.append((inicio + trabajador.recibidos, [resultado]))
+        trabajador.recibidos += 1
+        if trabajador.recibidos == len(trabajador.bloque):
+            trabajador.bloque = None
+
+    def descartar(trabajador, error, entregados):
+        """Da la expresión en curso por fallida, reenvía el resto y termina el proceso"""
+        entregados.append((trabajador.inicio + trabajador.recibidos,
+                           [Resultado(entrada=trabajador.bloque[trabajador.recibidos],
+                                      error=error)]))
+        inicio, resto = trabajador.pendientes()
+        if resto:
+            reintentos.append((inicio, resto))
+        trabajador.terminar()
+        trabajadores.remove(trabajador)
+
+    try:
+        while True:
+            # Un bloque por proceso: así el reloj de cada bloque empieza cuando
+            # realmente se ejecuta y la entrada se lee de forma perezosa. Los
+            # procesos se crean a medida que hace falta
+            for trabajador in [t for t in trabajadores if t.libre()]:
+                tarea = siguiente_bloque()
+                if tarea is None:
+                    break
+                trabajador.enviar(*tarea)
+            while len(trabajadores) < procesos:
+                tarea = siguiente_bloque()
+                if tarea is None:
+                    break
+                trabajadores.append(_Trabajador(argumentos))
+                trabajadores[-1].enviar(*tarea)
+
+            ocupados = [t for t in trabajadores if not t.libre()]
+            if not ocupados:
+                break
+
+            espera = INTERVALO_SONDEO
+            if limite:
+                proxima = min(t.fecha for t in ocupados)
+                espera = min(espera, max(0.0, proxima - time.monotonic()))
+            entregados = []
+            listas = multiprocessing.connection.wait([t.conexion for t in ocupados], espera)
+            for trabajador in ocupados:
+                if trabajador.conexion not in listas:
+                    continue
+                try:
+                    while not trabajador.libre() and trabajador.conexion.poll():
+                        recibir(trabajador, entregados)
+                except (EOFError, OSError):
+                    # El proceso murió (por ejemplo por falta de memoria)
+                    trabajador.proceso.join(1)
+                    codigo = trabajador.proceso.exitcode
+                    descartar(trabajador, f"Error en el proceso: terminó con código {codigo}",
+                              entregados)
+
+            if limite:
+                ahora = time.monotonic()
+                for trabajador in [t for t in trabajadores if not t.libre()]:
+                    if trabajador.fecha <= ahora:
+                        # Un proceso atascado en sympy solo se detiene matándolo;
+                        # los demás conservan su trabajo
+                        descartar(trabajador, "Tiempo agotado", entregados)
+
+            if ordenado:
+                terminados.update(entregados)
+                while siguiente in terminados:
+                    resultados = terminados.pop(siguiente)
+                    siguiente += len(resultados)
+                    yield from resultados
+            else:
+                for _, resultados in entregados:
+                    yield from resultados
+    finally:
+        for trabajador in trabajadores:
+            trabajador.terminar()
+
+# ==================== PUNTO DE ENTRADA POR LOTES ====================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analiza funciones por lotes y emite resultados en JSON Lines")
+    parser.add_argument('entrada', nargs='?', default='-',
+                        help="archivo con una función por línea ('-' para stdin)")
+    parser.add_argument('-o', '--salida', default='-',
+                        help="archivo de salida JSON Lines ('-' para stdout)")
+    parser.add_argument('-p', '--procesos', type=int, default=1,
+                        help="número de procesos (0 para usar todos los núcleos)")
+    parser.add_argument('--bloque', type=int, default=8,
+                        help="expresiones enviadas a cada proceso por tarea")
+    parser.add_argument('--desordenado', action='store_true',
+                        help="emitir los resultados en cuanto terminan")
+    parser.add_argument('--limite', type=float, default=None,
+                        help="segundos máximos por expresión (termina el proceso)")
+    parser.add_argument('--limite-etapa', type=float, default=None,
+                        help="segundos máximos por etapa; las etapas agotadas se omiten")
+    parser.add_argument('--cache', default=None,
+                        help="archivo SQLite donde persistir el cache entre ejecuciones")
+    parser.add_argument('--cache-tamano', type=int, default=4096,
+                        help="número máximo de entradas del cache")
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help="segundos que una entrada del cache sigue vigente")
+    parser.add_argument('--solo-basicas', action='store_true',
+                        help="omitir integral, serie de Taylor, límites y dominio")
+    parser.add_argument('--eventos', action='store_true',
+                        help="emitir una línea por etapa en cuanto termina (solo con un proceso)")
+    parser.add_argument('--perfil', action='store_true',
+                        help="incluir el perfil de cProfile de cada etapa en la salida")
+    parser.add_argument('--memoria', action='store_true',
+                        help="incluir el pico de memoria (tracemalloc) de cada etapa")
+    parser.add_argument('--metricas', default=None,
+                        help="archivo donde escribir métricas de texto de Prometheus al terminar")
+    args = parser.parse_args(argv)
+    if args.eventos and (args.procesos != 1 or args.limite is not None):
+        parser.error("--eventos no se puede combinar con --procesos ni --limite")
+
+    configurar_cache(max_tamano=args.cache_tamano, ttl=args.cache_ttl, ruta=args.cache)
+    etapas = ETAPAS_BASICAS if args.solo_basicas else ETAPAS
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, encoding='utf-8')
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'w', encoding='utf-8')
+
+    inicio = time.perf_counter()
+    total = 0
+    informes = []
+    try:
+        if args.eventos:
+            for expr in _limpiar_entradas(entrada):
+                for evento in analizar_por_etapas(expr, limite=args.limite_etapa, etapas=etapas,
+                                                  perfilar=args.perfil, memoria=args.memoria):
+                    salida.write(json.dumps(evento.a_dict(), ensure_ascii=False) + '\n')
+                    salida.flush()
+                informes.append(evento.resultado.rendimiento)
+                total += 1
+        else:
+            for resultado in analizar_lote(entrada, procesos=args.procesos, tam_bloque=args.bloque,
+                                           ordenado=not args.desordenado, limite=args.limite,
+                                           limite_etapa=args.limite_etapa, etapas=etapas,
+                                           perfilar=args.perfil, memoria=args.memoria):
+                salida.write(json.dumps(resultado.a_dict(), ensure_ascii=False) + '\n')
+                if resultado.rendimiento is not None:
+                    informes.append(resultado.rendimiento)
+                total += 1
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+
+    if args.metricas:
+        with open(args.metricas, 'w', encoding='utf-8') as archivo:
+            archivo.write(metricas_prometheus(informes, {'programa': 'analisis'}))
+
+    duracion = time.perf_counter() - inicio
+    velocidad = total / duracion if duracion > 0 else 0.0
+    print(f"{total} funciones en {duracion:.2f} s ({velocidad:.1f} funciones/s)",
+          file=sys.stderr)
+    if args.procesos == 1 and args.limite is None:
+        estadisticas = CACHE.estadisticas()
+        print(f"Cache: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos "
+              f"({estadisticas['tasa_aciertos']:.0%})", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
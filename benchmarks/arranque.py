@@ -0,0 +1,161 @@
+"""
+Tiempo de arranque de cada programa, medido con python -X importtime.
+
+Los programas crean su ventana al importarse, así que no se importan
+directamente: se extraen sus import de nivel superior y solo esos se ejecutan
+en un intérprete nuevo. El tiempo de cada programa es la suma de los tiempos
+acumulados de los módulos que importa, sin contar los que el intérprete ya
+carga por su cuenta. Además se comprueba que las ventanas no carguen al
+arrancar ninguno de los módulos pesados (sympy, matplotlib, PIL).
+
+    python benchmarks/arranque.py                 # compara con la línea base
+    python benchmarks/arranque.py --actualizar    # guarda la línea base
+    python benchmarks/arranque.py otro.py -r 10   # un solo programa
+
+Termina con código 1 si algún programa es más lento que su línea base (más
+la tolerancia), si no tiene línea base o si importa un módulo pesado al
+arrancar. La línea base (arranque_base.json, junto a este archivo) está en el
+repositorio; al cambiar de máquina o agregar un programa se regenera con
+--actualizar y se commitea.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from functools import lru_cache
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'arranque_base.json')
+
+# Programa -> módulos pesados que se permite importar al arrancar
+PROGRAMAS = {
+    'Programa_1_3.py': (),
+    'Programa_Graficador_2.py': (),
+    'funciones_trigonometricss.py': (),
+    'otro.py': (),
+    'otro_ayuda.py': (),
+    'prgram.py': (),
+    # El motor por lotes necesita sympy desde el principio
+    'analisis.py': ('sympy',),
+}
+PESADOS = ('sympy', 'matplotlib', 'PIL')
+
+
+def codigo_de_arranque(ruta):
+    """Código con solo los import de nivel superior del programa"""
+    with open(ruta, encoding='utf-8') as archivo:
+        arbol = ast.parse(archivo.read(), filename=ruta)
+    imports = [nodo for nodo in arbol.body if isinstance(nodo, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=imports, type_ignores=[])) or 'pass'
+
+
+def _importtime(codigo):
+    """Ejecuta el código con -X importtime y devuelve [(nivel, módulo, acumulado en µs)]"""
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                             cwd=RAIZ, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        ultima = proceso.stderr.strip().splitlines()[-1:] or ["error desconocido"]
+        raise RuntimeError(ultima[0])
+
+    entradas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:'):
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        if not acumulado.strip().isdigit():
+            continue  # encabezado
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        entradas.append((nivel, nombre.strip(), int(acumulado)))
+    return entradas
+
+
+@lru_cache(maxsize=None)
+def _modulos_del_interprete():
+    """Módulos que el intérprete importa aunque no se le pida nada"""
+    return frozenset(nombre for _, nombre, _ in _importtime('pass'))
+
+
+def medir(programa, repeticiones=5):
+    """Devuelve el menor tiempo de arranque en ms y los módulos importados"""
+    propios = _modulos_del_interprete()
+    codigo = codigo_de_arranque(os.path.join(RAIZ, programa))
+    # Una pasada sin medir deja los archivos en el cache del sistema operativo
+    _importtime(codigo)
+
+    tiempos = []
+    modulos = set()
+    for _ in range(repeticiones):
+        entradas = _importtime(codigo)
+        modulos = {nombre for _, nombre, _ in entradas}
+        tiempos.append(sum(acumulado for nivel, nombre, acumulado in entradas
+                           if nivel == 0 and nombre not in propios) / 1000)
+    return min(tiempos), modulos
+
+
+def pesados_importados(programa, modulos):
+    """Módulos pesados que el programa importa al arrancar sin tener permiso"""
+    permitidos = PROGRAMAS.get(programa, ())
+    return sorted(pesado for pesado in PESADOS
+                  if pesado not in permitidos and pesado in modulos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de cada programa")
+    parser.add_argument('programas', nargs='*', default=list(PROGRAMAS),
+                        help="programas a medir (por defecto todos)")
+    parser.add_argument('-r', '--repeticiones', type=int, default=5,
+                        help="mediciones por programa; se usa la menor")
+    parser.add_argument('--tolerancia', type=float, default=0.25,
+                        help="fracción de la línea base que se tolera de más")
+    parser.add_argument('--margen', type=float, default=30.0,
+                        help="milisegundos que se toleran además de la fracción")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="guardar los tiempos medidos como nueva línea base")
+    args = parser.parse_args(argv)
+
+    base = {}
+    if os.path.exists(LINEA_BASE):
+        with open(LINEA_BASE, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+
+    fallos = 0
+    medidos = {}
+    for programa in args.programas:
+        try:
+            tiempo, modulos = medir(programa, args.repeticiones)
+        except RuntimeError as e:
+            print(f"{programa:30} ERROR: {e}")
+            fallos += 1
+            continue
+        medidos[programa] = round(tiempo, 1)
+
+        avisos = []
+        pesados = pesados_importados(programa, modulos)
+        if pesados:
+            avisos.append(f"importa {', '.join(pesados)} al arrancar")
+        anterior = base.get(programa)
+        if anterior is not None and tiempo > anterior * (1 + args.tolerancia) + args.margen:
+            avisos.append(f"más lento que la línea base ({anterior:.1f} ms)")
+        if anterior is None and not args.actualizar:
+            avisos.append("FALTA LÍNEA BASE (use --actualizar)")
+        if avisos and not args.actualizar:
+            fallos += 1
+
+        referencia = f"(base {anterior:.1f} ms)" if anterior is not None else "(sin línea base)"
+        estado = '; '.join(avisos) or ('nuevo' if anterior is None else 'ok')
+        print(f"{programa:30} {tiempo:8.1f} ms {referencia:20} {estado}")
+
+    if args.actualizar:
+        base.update(medidos)
+        with open(LINEA_BASE, 'w', encoding='utf-8') as archivo:
+            json.dump(base, archivo, indent=2, sort_keys=True)
+            archivo.write('\n')
+        print(f"Línea base guardada en {os.path.relpath(LINEA_BASE, RAIZ)}")
+        return 0
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""
+Tiempos y memoria de cada cálculo del proyecto sobre un corpus realista.
+
+Cada caso mide una sola función (validar_funcion, encontrar_puntos_criticos,
+resolver_ecuacion_trig, parsear, ...) aplicada a todo su corpus: los
+ejemplos de las ventanas, polinomios de grado alto, funciones racionales,
+las ecuaciones de los módulos trigonométricos y sistemas 3x3 aleatorios
+para prgram.py. Antes de cada repetición se vacían los caches del proyecto
+y de sympy, así que se mide el costo en frío. Las primeras pasadas de
+calentamiento no se miden (cargan los submódulos que sympy importa al usarse
+por primera vez) y se compara el mínimo de las repeticiones, que es lo que
+menos varía con la carga de la máquina. Un caso que supera su línea base se
+vuelve a medir (--reintentos) y cuenta el menor de todos los mínimos: una
+racha de carga dura varios segundos, una regresión se repite siempre. La
+memoria es el pico que registra tracemalloc durante una pasada aparte.
+
+    python benchmarks/calculo.py                  # compara con la línea base
+    python benchmarks/calculo.py --actualizar     # guarda la línea base
+    python benchmarks/calculo.py -k trig -r 9     # solo los casos con "trig"
+
+Termina con código 1 si algún caso supera su línea base en tiempo o en
+memoria más la tolerancia, o si no tiene línea base. La línea base
+(calculo_base.json, junto a este archivo) está en el repositorio; al cambiar
+de máquina o agregar un caso se regenera con --actualizar y se commitea.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+import sympy as sp
+from sympy.core.cache import clear_cache
+
+import analisis
+import funciones_trigonometricss
+import otro
+import prgram
+from expresiones import parsear, parsear_ecuacion
+from numerico import limpiar_compiladas
+from Programa_Graficador_2 import EJEMPLOS
+
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'calculo_base.json')
+SEMILLA = 2024
+
+# ==================== CORPUS ====================
+
+RACIONALES = [
+    "1/(x**2 - 1)",
+    "(x**2 + 1)/(x - 2)",
+    "x/(x**2 + 4)",
+    "(x**3 - 2*x)/(x**2 - 9)",
+    "(2*x + 3)/(x**2 + x + 1)",
+]
+
+# Ecuaciones en radianes para funciones_trigonometricss.py
+ECUACIONES_RADIANES = [
+    "sin(x)=0.5",
+    "cos(x)=0",
+    "tan(x)=1",
+    "2*sin(x)**2 - 1=0",
+    "sin(x) + cos(x)=1",
+]
+
+
+def polinomios(grados=(6, 10, 14), semilla=SEMILLA):
+    """Polinomios con coeficientes enteros aleatorios, uno por grado"""
+    rng = np.random.default_rng(semilla)
+    resultado = []
+    for grado in grados:
+        coeficientes = rng.integers(-9, 10, size=grado + 1)
+        coeficientes[0] = rng.integers(1, 10)
+        resultado.append(" + ".join(f"({c})*x**{grado - k}" for k, c in enumerate(coeficientes)
+                                    if c != 0))
+    return resultado
+
+
+def funciones():
+    """Corpus de funciones de una variable"""
+    return list(EJEMPLOS) + polinomios() + RACIONALES
+
+
+def _ecuacion_lineal(fila):
+    """Texto 'ax+by+cz=d' en el formato que acepta prgram.parsear"""
+    terminos = "".join(f"{c:+d}{var}" for c, var in zip(fila[:3], "xyz") if c != 0)
+    return f"{terminos.lstrip('+')}={fila[3]}"
+
+
+def sistemas(cantidad=200, semilla=SEMILLA):
+    """Sistemas 3x3 aleatorios con solución única, como tres ecuaciones de texto"""
+    rng = np.random.default_rng(semilla)
+    resultado = []
+    while len(resultado) < cantidad:
+        matriz = rng.integers(-9, 10, size=(3, 4))
+        if abs(np.linalg.det(matriz[:, :3])) < 1e-9:
+            continue
+        resultado.append([_ecuacion_lineal(fila) for fila in matriz])
+    return resultado
+
+# ==================== CASOS ====================
+
+def limpiar_caches():
+    """Vacía los caches del proyecto y de sympy para medir en frío"""
+    analisis.obtener_derivadas.cache_clear()
+    analisis.coeficientes_polinomio.cache_clear()
+    analisis.CACHE.limpiar()
+    limpiar_compiladas()
+    parsear.cache_clear()
+    parsear_ecuacion.cache_clear()
+    prgram.parsear.cache_clear()
+    clear_cache()
+
+
+def _preparar_funciones():
+    x = sp.Symbol('x')
+    return x, [analisis.validar_funcion(expr) for expr in funciones()]
+
+
+def _preparar_puntos():
+    x, fs = _preparar_funciones()
+    return x, [(f, [p for p, _ in analisis.encontrar_puntos_criticos(f, x)]) for f in fs]
+
+
+def _preparar_sistemas():
+    return [[prgram.parsear(ec) for ec in sistema] for sistema in sistemas()]
+
+
+def _validar(exprs):
+    for expr in exprs:
+        analisis.validar_funcion(expr)
+
+
+def _puntos_criticos(datos):
+    x, fs = datos
+    for f in fs:
+        analisis.encontrar_puntos_criticos(f, x)
+
+
+def _clasificar(datos):
+    x, puntos = datos
+    for f, criticos in puntos:
+        analisis.clasificar_puntos_criticos(f, x, criticos)
+
+
+def _integrales(datos):
+    x, fs = datos
+    for f in fs:
+        analisis.calcular_integral(f, x)
+
+
+def _taylor(datos):
+    x, fs = datos
+    for f in fs:
+        analisis.calcular_taylor(f, x)
+
+
+def _rangos(datos):
+    x, fs = datos
+    for f in fs:
+        analisis.determinar_rango_optimo(f, [], x)
+
+
+def _trig_radianes(ecuaciones):
+    for ec in ecuaciones:
+        funciones_trigonometricss.resolver_ecuacion_trig(ec, -2 * np.pi, 2 * np.pi)
+
+
+def _trig_grados(ecuaciones):
+    for ec in ecuaciones:
+        otro.resolver_ecuacion_trig(ec, 0, 360, en_grados=True)
+
+
+def _trig_rango_amplio(ecuaciones):
+    for ec in ecuaciones:
+        otro.resolver_ecuacion_trig(ec, 0, 36000, en_grados=True)
+
+
+def _trig_numerico(ecuaciones):
+    for ec in ecuaciones:
+        otro.resolver_ecuacion_trig(ec, 0, 36000, en_grados=True, metodo='numerico')
+
+
+def _parsear(ecuaciones):
+    for ec in ecuaciones:
+        prgram.parsear(ec)
+
+
+def _cramer(coeficientes):
+    for (a1, b1, c1, d1), (a2, b2, c2, d2), (a3, b3, c3, d3) in coeficientes:
+        prgram.cramer_pasos(a1, b1, c1, d1, a2, b2, c2, d2, a3, b3, c3, d3)
+
+
+def _resolver_lote(aumentadas):
+    prgram.resolver_lote(aumentadas)
+
+
+# Nombre -> (preparación fuera del tiempo medido, función medida)
+CASOS = {
+    'validar_funcion': (funciones, _validar),
+    'encontrar_puntos_criticos': (_preparar_funciones, _puntos_criticos),
+    'clasificar_puntos_criticos': (_preparar_puntos, _clasificar),
+    'calcular_integral': (_preparar_funciones, _integrales),
+    'calcular_taylor': (_preparar_funciones, _taylor),
+    'determinar_rango_optimo': (_preparar_funciones, _rangos),
+    'resolver_ecuacion_trig (radianes)': (lambda: ECUACIONES_RADIANES, _trig_radianes),
+    'resolver_ecuacion_trig (grados)': (lambda: otro.EJEMPLOS, _trig_grados),
+    'resolver_ecuacion_trig (0-36000°)': (lambda: otro.EJEMPLOS, _trig_rango_amplio),
+    'resolver_ecuacion_trig (numérico)': (lambda: otro.EJEMPLOS, _trig_numerico),
+    'parsear': (lambda: [ec for sistema in sistemas() for ec in sistema], _parsear),
+    'cramer_pasos': (_preparar_sistemas, _cramer),
+    'resolver_lote': (lambda: np.array(_preparar_sistemas()), _resolver_lote),
+}
+
+# ==================== MEDICIÓN ====================
+
+def medir(caso, repeticiones=5, calentamiento=2):
+    """Devuelve el mínimo y la mediana en ms y el pico de memoria en KiB"""
+    preparar, ejecutar = CASOS[caso]
+    datos = preparar()
+
+    for _ in range(calentamiento):
+        limpiar_caches()
+        ejecutar(datos)
+
+    tiempos = []
+    for _ in range(repeticiones):
+        limpiar_caches()
+        inicio = time.perf_counter()
+        ejecutar(datos)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    limpiar_caches()
+    tracemalloc.start()
+    try:
+        ejecutar(datos)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tiempos), statistics.median(tiempos), pico / 1024
+
+
+def entorno():
+    """Versiones que influyen en los tiempos; se guardan junto a la línea base"""
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'sympy': sp.__version__, 'maquina': platform.machine()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide cada cálculo y lo compara con la línea base")
+    parser.add_argument('-k', '--filtro', default='',
+                        help="medir solo los casos cuyo nombre contenga este texto")
+    parser.add_argument('-r', '--repeticiones', type=int, default=5,
+                        help="mediciones por caso; se compara la menor")
+    parser.add_argument('--calentamiento', type=int, default=2,
+                        help="pasadas sin medir antes de las repeticiones")
+    parser.add_argument('--reintentos', type=int, default=2,
+                        help="veces que se vuelve a medir un caso más lento que su línea base")
+    parser.add_argument('--tolerancia', type=float, default=0.3,
+                        help="fracción de la línea base que se tolera de más en tiempo")
+    parser.add_argument('--margen', type=float, default=5.0,
+                        help="milisegundos que se toleran además de la fracción")
+    parser.add_argument('--tolerancia-memoria', type=float, default=0.5,
+                        help="fracción de la línea base que se tolera de más en memoria")
+    parser.add_argument('--actualizar', action='store_true',
+                        help="guardar los valores medidos como nueva línea base")
+    args = parser.parse_args(argv)
+
+    base = {}
+    if os.path.exists(LINEA_BASE):
+        with open(LINEA_BASE, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+    if base.get('_entorno', entorno()) != entorno():
+        print(f"Aviso: la línea base se midió con {base['_entorno']}", file=sys.stderr)
+
+    fallos = 0
+    for caso in CASOS:
+        if args.filtro not in caso:
+            continue
+        minimo, mediana, pico = medir(caso, args.repeticiones, args.calentamiento)
+
+        avisos = []
+        anterior = base.get(caso)
+        if anterior is not None:
+            limite = anterior['tiempo_ms'] * (1 + args.tolerancia) + args.margen
+            for _ in range(0 if args.actualizar else args.reintentos):
+                if minimo <= limite:
+                    break
+                otro_minimo, otra_mediana, _ = medir(caso, args.repeticiones, args.calentamiento)
+                if otro_minimo < minimo:
+                    minimo, mediana = otro_minimo, otra_mediana
+            if minimo > limite:
+                avisos.append(f"tiempo base {anterior['tiempo_ms']:.1f} ms")
+            if pico > anterior['memoria_kib'] * (1 + args.tolerancia_memoria):
+                avisos.append(f"memoria base {anterior['memoria_kib']:.0f} KiB")
+        if (avisos or anterior is None) and not args.actualizar:
+            fallos += 1
+
+        if avisos:
+            estado = "REGRESIÓN: " + "; ".join(avisos)
+        elif anterior is not None:
+            estado = "ok"
+        else:
+            estado = "nuevo" if args.actualizar else "FALTA LÍNEA BASE (use --actualizar)"
+        print(f"{caso:36} {minimo:10.1f} ms (mediana {mediana:8.1f}) {pico:10.0f} KiB  {estado}")
+        if args.actualizar:
+            base[caso] = {'tiempo_ms': round(minimo, 2), 'memoria_kib': round(pico, 1)}
+
+    if args.actualizar:
+        base['_entorno'] = entorno()
+        with open(LINEA_BASE, 'w', encoding='utf-8') as archivo:
+            json.dump(base, archivo, indent=2, sort_keys=True, ensure_ascii=False)
+            archivo.write('\n')
+        print(f"Línea base guardada en {os.path.relpath(LINEA_BASE, RAIZ)}")
+        return 0
+    return 1 if fallos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
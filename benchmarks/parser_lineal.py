@@ -0,0 +1,117 @@
+"""
+Velocidad del parser de ecuaciones lineales de prgram.py.
+
+Compara el parser anterior (replace/split y una expresión regular por
+término, copiado aquí tal como era) con el actual, ecuación por ecuación con
+parsear y de una sola vez con parsear_sistemas, sobre ecuaciones 'ax+by+cz=d'
+generadas al azar.
+
+    python benchmarks/parser_lineal.py                # 100 000 ecuaciones
+    python benchmarks/parser_lineal.py -n 10000 -r 5
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+
+import prgram
+
+SEMILLA = 2024
+
+
+def parsear_anterior(ec):
+    """El parsear original de prgram.py, para comparar"""
+    ec = ec.replace(" ", "")
+
+    if "=" not in ec:
+        raise ValueError("La ecuación debe incluir '='")
+
+    izq, der = ec.split("=")
+    d = float(der)
+
+    izq = izq.replace("-", "+-")
+    if izq[0] == "+":
+        izq = izq[1:]
+
+    terminos = izq.split("+")
+
+    a = b = c = 0.0
+    patron = re.compile(r"([+-]?\d*\.?\d*)(x|y|z)")
+
+    for t in terminos:
+        if t == "":
+            continue
+
+        m = patron.fullmatch(t)
+        if not m:
+            raise ValueError(f"Término inválido: {t}")
+
+        coef, var = m.groups()
+
+        if coef in ("", "+", "-"):
+            coef = coef + "1"
+
+        coef = float(coef)
+
+        if var == "x": a += coef
+        elif var == "y": b += coef
+        elif var == "z": c += coef
+
+    return a, b, c, d
+
+
+def ecuaciones(cantidad, semilla=SEMILLA):
+    """Ecuaciones de tres variables con coeficientes enteros no nulos"""
+    rng = np.random.default_rng(semilla)
+    coeficientes = rng.integers(1, 10, size=(cantidad, 4)) * rng.choice([-1, 1], size=(cantidad, 4))
+    return [f"{a}x{b:+d}y{c:+d}z={d}" for a, b, c, d in coeficientes.tolist()]
+
+
+def _cronometrar(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el parser lineal anterior con el actual")
+    parser.add_argument('-n', '--cantidad', type=int, default=100_000,
+                        help="número de ecuaciones (se agrupan en sistemas de 3)")
+    parser.add_argument('-r', '--repeticiones', type=int, default=3,
+                        help="mediciones por caso; se informa la mediana")
+    args = parser.parse_args(argv)
+
+    lista = ecuaciones(args.cantidad - args.cantidad % 3)
+    texto = "\n\n".join("\n".join(lista[i:i + 3]) for i in range(0, len(lista), 3))
+
+    # Los tres caminos deben dar los mismos coeficientes
+    esperado = np.array([parsear_anterior(ec) for ec in lista])
+    assert np.allclose(np.array([prgram.parsear(ec) for ec in lista]), esperado)
+    assert np.allclose(prgram.parsear_sistemas(texto, ('x', 'y', 'z'))[0].reshape(-1, 4), esperado)
+
+    casos = {
+        'parsear anterior': lambda: [parsear_anterior(ec) for ec in lista],
+        'parsear': lambda: [prgram.parsear(ec) for ec in lista],
+        'parsear_sistemas': lambda: prgram.parsear_sistemas(texto, ('x', 'y', 'z')),
+    }
+    referencia = None
+    for nombre, funcion in casos.items():
+        tiempo = _cronometrar(funcion, args.repeticiones)
+        referencia = referencia or tiempo
+        print(f"{nombre:20} {tiempo:10.1f} ms  {len(lista) / tiempo * 1000:12,.0f} ec/s  "
+              f"x{referencia / tiempo:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Cache LRU acotado por tamaño y antigüedad, con persistencia opcional en SQLite.
+
+Lo usa analisis.py para no volver a interpretar ni recalcular funciones que
+ya se analizaron, incluso entre sesiones si se indica una ruta de archivo.
+Las claves en disco llevan la versión de los resultados: al cambiar lo que
+calcula alguna etapa se sube la versión y lo guardado antes deja de usarse.
+Los valores se copian al guardar y al devolver, así que quien modifique una
+lista obtenida del cache no cambia lo que reciben los demás.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Formato de la tabla en disco; un archivo con otro formato se vacía al abrirlo
+FORMATO_DISCO = 2
+
+# Segundos entre dos actualizaciones de la hora de acceso en disco de una
+# misma entrada, para no escribir en el archivo en cada acierto
+INTERVALO_ACCESO = 60.0
+
+
+def _copia(valor):
+    """Copia de las listas, diccionarios y conjuntos del valor; lo inmutable se comparte"""
+    if isinstance(valor, list):
+        return [_copia(elemento) for elemento in valor]
+    if type(valor) is tuple:
+        return tuple(_copia(elemento) for elemento in valor)
+    if isinstance(valor, dict):
+        return {clave: _copia(elemento) for clave, elemento in valor.items()}
+    if isinstance(valor, set):
+        return set(valor)
+    return valor
+
+
+class CacheLRU:
+    """
+    Cache LRU con límite de entradas, caducidad (ttl) y contadores de uso.
+
+    La caducidad se cuenta desde que se guardó el valor; el desalojo, en
+    memoria y en disco, desde la última vez que se usó.
+    """
+
+    def __init__(self, max_tamano=4096, ttl=None, ruta=None, version=1):
+        self.max_tamano = max_tamano
+        self.ttl = ttl
+        self.ruta = ruta
+        self.version = version
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()  # clave -> (instante, valor, último acceso en disco)
+        self._candado = threading.RLock()
+        self._conexion = None
+        self._pid = None
+
+    # ---------- interfaz pública ----------
+
+    def obtener(self, clave, defecto=None):
+        """Devuelve el valor guardado para la clave o defecto si no está"""
+        with self._candado:
+            entrada = self._datos.get(clave)
+            if entrada is not None and self._vigente(entrada[0]):
+                self._datos.move_to_end(clave)
+                ahora = time.time()
+                if ahora - entrada[2] >= INTERVALO_ACCESO:
+                    self._tocar_disco(clave, ahora)
+                    self._datos[clave] = (entrada[0], entrada[1], ahora)
+                self.aciertos += 1
+                return _copia(entrada[1])
+            if entrada is not None:
+                del self._datos[clave]
+
+            entrada = self._leer_disco(clave)
+            if entrada is not None:
+                ahora = time.time()
+                self._tocar_disco(clave, ahora)
+                self._guardar_memoria(clave, entrada[0], entrada[1], ahora)
+                self.aciertos += 1
+                return _copia(entrada[1])
+
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor):
+        """Guarda un valor, desalojando los menos usados si se excede el tamaño"""
+        instante = time.time()
+        valor = _copia(valor)
+        with self._candado:
+            self._guardar_memoria(clave, instante, valor, instante)
+            self._escribir_disco(clave, instante, valor)
+
+    def limpiar(self):
+        """Vacía el cache en memoria y en disco y reinicia los contadores"""
+        with self._candado:
+            self._datos.clear()
+            self.aciertos = self.fallos = 0
+            conexion = self._conectar()
+            if conexion is not None:
+                with conexion:
+                    conexion.execute("DELETE FROM cache")
+
+    def estadisticas(self):
+        """Devuelve aciertos, fallos, tasa de aciertos y tamaño actual"""
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+                'tamano': len(self._datos),
+            }
+
+    # ---------- memoria ----------
+
+    def _vigente(self, instante):
+        return self.ttl is None or time.time() - instante <= self.ttl
+
+    def _guardar_memoria(self, clave, instante, valor, acceso):
+        self._datos[clave] = (instante, valor, acceso)
+        self._datos.move_to_end(clave)
+        while len(self._datos) > self.max_tamano:
+            self._datos.popitem(last=False)
+
+    # ---------- disco ----------
+
+    def _conectar(self):
+        """Abre la base SQLite; se reabre en cada proceso hijo tras un fork"""
+        if self.ruta is None:
+            return None
+        if self._conexion is None or self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False)
+            with self._conexion:
+                formato, = self._conexion.execute("PRAGMA user_version").fetchone()
+                if formato != FORMATO_DISCO:
+                    # Tabla de una versión anterior de este módulo: no se puede leer
+                    self._conexion.execute("DROP TABLE IF EXISTS cache")
+                    self._conexion.execute(f"PRAGMA user_version = {FORMATO_DISCO}")
+                self._conexion.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(clave TEXT PRIMARY KEY, instante REAL, acceso REAL, valor BLOB)")
+                self._conexion.execute(
+                    "CREATE INDEX IF NOT EXISTS cache_acceso ON cache (acceso)")
+            self._pid = os.getpid()
+        return self._conexion
+
+    def _clave_disco(self, clave):
+        return f"{self.version}:{clave}"
+
+    def _leer_disco(self, clave):
+        conexion = self._conectar()
+        if conexion is None:
+            return None
+        fila = conexion.execute("SELECT instante, valor FROM cache WHERE clave = ?",
+                                (self._clave_disco(clave),)).fetchone()
+        if fila is None:
+            return None
+        instante, datos = fila
+        if not self._vigente(instante):
+            with conexion:
+                conexion.execute("DELETE FROM cache WHERE clave = ?", (self._clave_disco(clave),))
+            return None
+        try:
+            return instante, pickle.loads(datos)
+        except Exception:
+            return None
+
+    def _tocar_disco(self, clave, acceso):
+        """Anota en disco el último uso de la clave, que decide qué se desaloja"""
+        conexion = self._conectar()
+        if conexion is None:
+            return
+        with conexion:
+            conexion.execute("UPDATE cache SET acceso = ? WHERE clave = ?",
+                             (acceso, self._clave_disco(clave)))
+
+    def _escribir_disco(self, clave, instante, valor):
+        conexion = self._conectar()
+        if conexion is None:
+            return
+        try:
+            datos = pickle.dumps(valor)
+        except Exception:
+            return
+        with conexion:
+            conexion.execute(
+                "INSERT OR REPLACE INTO cache (clave, instante, acceso, valor) "
+                "VALUES (?, ?, ?, ?)",
+                (self._clave_disco(clave), instante, instante, datos))
+            # Desalojar las entradas usadas hace más tiempo si el archivo crece demasiado
+            conexion.execute(
+                "DELETE FROM cache WHERE clave IN "
+                "(SELECT clave FROM cache ORDER BY acceso DESC LIMIT -1 OFFSET ?)",
+                (self.max_tamano,))
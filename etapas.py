@@ -0,0 +1,15 @@
+"""
+Nombres de las etapas del análisis.
+
+Están aparte de analisis.py para que la interfaz pueda usarlos al arrancar
+sin importar sympy, que solo se carga al hacer el primer cálculo.
+"""
+
+# Nombres de las etapas del análisis, en orden de ejecución
+ETAPAS = ('parseo', 'derivada', 'puntos_criticos', 'clasificacion', 'segunda_derivada',
+          'integral', 'taylor', 'limites', 'dominio')
+
+# Etapas rápidas que casi siempre se consultan y etapas lentas que solo
+# dependen de la función interpretada, y pueden pedirse por separado
+ETAPAS_BASICAS = ETAPAS[:5]
+ETAPAS_AVANZADAS = ETAPAS[5:]
@@ -0,0 +1,63 @@
+"""
+Interpretación de las expresiones y ecuaciones que escribe el usuario.
+
+Todas las ventanas convierten el texto a sympy con estas mismas funciones,
+así que aceptan la misma sintaxis: ^ como potencia, multiplicación implícita
+(2x, 3 sen x) y los nombres en español sen, arcsen, arccos y arctan. Las
+ecuaciones (con un '=') se interpretan aparte, para que una función como
+'y = x^2' no se acepte en silencio. El resultado se guarda en un cache LRU:
+volver a interpretar un texto ya visto (al graficar lo que se acaba de
+resolver, o al repetir un cálculo) cuesta una búsqueda en un diccionario.
+"""
+from functools import lru_cache
+
+from perezoso import ModuloPerezoso
+
+sp = ModuloPerezoso('sympy')
+
+# Nombres en español que se aceptan además de los de sympy
+NOMBRES = {
+    'sen': 'sin',
+    'arcsen': 'asin',
+    'arccos': 'acos',
+    'arctan': 'atan',
+}
+
+
+@lru_cache(maxsize=256)
+def parsear(texto):
+    """
+    Convierte el texto de una expresión en una expresión de sympy.
+
+    Si el texto no es válido se propaga el error de sympy (o un ValueError).
+    """
+    if '=' in texto:
+        raise ValueError("Se esperaba una expresión, no una ecuación con '='")
+    locales = {nombre: getattr(sp, funcion) for nombre, funcion in NOMBRES.items()}
+    return sp.parse_expr(texto, local_dict=locales, transformations='all')
+
+
+@lru_cache(maxsize=256)
+def parsear_ecuacion(texto):
+    """
+    Convierte el texto de una ecuación 'a = b' en a - b, lista para igualar a cero.
+
+    Sin '=' el texto se toma como el lado izquierdo de 'a = 0'.
+    """
+    lados = texto.split('=')
+    if len(lados) > 2:
+        raise ValueError("La ecuación tiene más de un '='")
+    izquierda, *derecha = [parsear(lado) for lado in lados]
+    return izquierda - derecha[0] if derecha else izquierda
+
+
+@lru_cache(maxsize=256)
+def a_grados(expr, x):
+    """
+    Reescribe expr para que la variable x se mida en grados (x -> pi*x/180).
+
+    La sustitución se hace una sola vez sobre la expresión; al compilar el
+    resultado, las curvas y las raíces salen directamente en grados, sin
+    convertir cada arreglo de puntos de ida y vuelta.
+    """
+    return expr.subs(x, sp.pi * x / 180)
@@ -1,73 +1,98 @@
 import tkinter as tk
 from tkinter import messagebox
-import numpy as np
-import matplotlib.pyplot as plt
-import sympy as sp
+
+import periodicas
+from expresiones import parsear_ecuacion
+from muestreo import muestrear_adaptativo, rango_y
+from numerico import compilar
+from perezoso import ModuloPerezoso
+from rendimiento import Rendimiento, medir
+
+# La ventana abre sin esperar a sympy ni a matplotlib: se cargan al resolver
+sp = ModuloPerezoso('sympy')
+plt = ModuloPerezoso('matplotlib.pyplot')
 
 # =============================
 #     RESOLVER ECUACIÓN
 # =============================
 
-def resolver_ecuacion_trig(ec_str, xmin, xmax):
+def resolver_ecuacion_trig(ec_str, xmin, xmax, rendimiento=None, metodo='simbolico',
+                           multiplicidad=False):
+    """
+    Soluciones de la ecuación en [xmin, xmax] y un mensaje de error (o None).
+
+    Con metodo='numerico' no se resuelve nada simbólicamente: se buscan las
+    raíces en una malla, lo que es mucho más rápido en ecuaciones que sympy
+    tarda en resolver. Con multiplicidad=True cada solución es un par
+    (valor, multiplicidad).
+    """
     x = sp.symbols('x')
 
     # Pasar ecuación en texto a SymPy
-    try:
-        lado_izq, lado_der = ec_str.split("=")
-        expr = sp.sympify(lado_izq) - sp.sympify(lado_der)
-    except Exception as e:
-        return None, f"Error al interpretar la ecuación: {e}"
+    with medir(rendimiento, 'parseo') as medicion:
+        try:
+            expr = medicion.valor = parsear_ecuacion(ec_str)
+        except Exception as e:
+            medicion.estado = 'error'
+            return None, f"Error al interpretar la ecuación: {e}"
+
+    if metodo == 'numerico':
+        with medir(rendimiento, 'busqueda') as medicion:
+            try:
+                soluciones = periodicas.raices_numericas(expr, x, xmin, xmax).tolist()
+            except ValueError as e:
+                medicion.estado = 'error'
+                return None, str(e)
+    else:
+        # Solución simbólica
+        with medir(rendimiento, 'resolucion') as medicion:
+            try:
+                # solveset da las familias completas (ImageSet), no solo las principales
+                conjunto = medicion.valor = sp.solveset(expr, x, sp.S.Reals)
+            except Exception as e:
+                medicion.estado = 'error'
+                return None, f"Error al resolver la ecuación: {e}"
 
-    # Solución simbólica
-    try:
-        soluciones = sp.solve(sp.Eq(expr, 0), x)
-    except Exception as e:
-        return None, f"Error al resolver la ecuación: {e}"
+        with medir(rendimiento, 'expansion') as medicion:
+            try:
+                soluciones = _expandir_soluciones(conjunto, expr, x, xmin, xmax)
+            except ValueError as e:
+                medicion.estado = 'error'
+                return None, str(e)
 
-    # Expandir soluciones periódicas
-    sol_numericas = []
-    for sol in soluciones:
-        try:
-            # Intentar solución numérica
-            val = float(sol)
-            if xmin <= val <= xmax:
-                sol_numericas.append(val)
-        except:
-            # Si es solución general con 'n', hacer un muestreo
-            n = sp.symbols('n', integer=True)
-            for k in range(-10, 11):
-                try:
-                    s = sol.subs(n, k)
-                    val = float(s)
-                    if xmin <= val <= xmax:
-                        sol_numericas.append(val)
-                except:
-                    pass
-
-    sol_numericas = sorted(set([round(s, 5) for s in sol_numericas]))
-
-    return sol_numericas, None
+    if multiplicidad:
+        with medir(rendimiento, 'multiplicidad'):
+            soluciones = list(zip(soluciones, periodicas.multiplicidad(expr, x, soluciones)))
+    return soluciones, None
+
+
+def _expandir_soluciones(soluciones, expr, x, xmin, xmax):
+    """Valores numéricos de las soluciones (y de sus familias periódicas) en [xmin, xmax]"""
+    return periodicas.raices_en_rango(soluciones, expr, x, xmin, xmax).tolist()
 
 
 # =============================
 #        GRAFICAR
 # =============================
 
-def graficar(ec_str, xmin, xmax, soluciones):
+def graficar(ec_str, xmin, xmax, soluciones, rendimiento=None):
     x = sp.symbols('x')
 
-    lado_izq, lado_der = ec_str.split("=")
-    expr = sp.sympify(lado_izq) - sp.sympify(lado_der)
+    # Ya se interpretó al resolver: sale del cache
+    expr = parsear_ecuacion(ec_str)
 
-    # Convertir a función numérica
-    f = sp.lambdify(x, expr, "numpy")
+    with medir(rendimiento, 'muestreo'):
+        # Convertir a función numérica
+        f = compilar(expr, x)
 
-    X = np.linspace(xmin, xmax, 2000)
-    Y = f(X)
+        X, Y = muestrear_adaptativo(f, xmin, xmax, max_puntos=2000)
+        # Sin que las asíntotas (tan, sec, ...) aplasten la curva; el eje y = 0 siempre se ve
+        y_min, y_max = rango_y(X, Y, [0])
 
     plt.figure(figsize=(8,4))
     plt.axhline(0, color="black", linewidth=1)
     plt.plot(X, Y, label=f"{ec_str}")
+    plt.ylim(y_min, y_max)
 
     # Marcar soluciones
     for s in soluciones:
@@ -86,7 +111,24 @@ def graficar(ec_str, xmin, xmax, soluciones):
 #       INTERFAZ TKINTER
 # =============================
 
+# Mediciones de la última resolución, para la ventana de rendimiento
+ultimo_rendimiento = None
+
+
+def ver_rendimiento():
+    """Muestra el tiempo de cada etapa de la última resolución"""
+    if ultimo_rendimiento is None:
+        messagebox.showinfo("Rendimiento", "Aún no se ha resuelto ninguna ecuación.")
+        return
+    ventana = tk.Toplevel(root)
+    ventana.title("Rendimiento")
+    texto = tk.Text(ventana, width=90, height=14, wrap=tk.NONE, font=("Courier New", 9))
+    texto.pack(fill=tk.BOTH, expand=True)
+    texto.insert("end", ultimo_rendimiento.resumen())
+
+
 def ejecutar():
+    global ultimo_rendimiento
     ec = entrada_ec.get()
     try:
         xmin = float(entrada_min.get())
@@ -95,41 +137,51 @@ def ejecutar():
         messagebox.showerror("Error", "Rango inválido.")
         return
 
-    soluciones, error = resolver_ecuacion_trig(ec, xmin, xmax)
+    ultimo_rendimiento = Rendimiento()
+    metodo = 'numerico' if var_numerico.get() else 'simbolico'
+    resultado, error = resolver_ecuacion_trig(ec, xmin, xmax, ultimo_rendimiento, metodo,
+                                              multiplicidad=True)
 
     if error:
         messagebox.showerror("Error", error)
         return
+    soluciones = [s for s, _ in resultado]
 
     if not soluciones:
         messagebox.showinfo("Soluciones", "No se encontraron soluciones en este rango.")
     else:
-        messagebox.showinfo("Soluciones", "\n".join([str(s) for s in soluciones]))
+        messagebox.showinfo("Soluciones", "\n".join(
+            [str(s) if m == 1 else f"{s} (multiplicidad {m})" for s, m in resultado]))
 
-    graficar(ec, xmin, xmax, soluciones)
+    graficar(ec, xmin, xmax, soluciones, ultimo_rendimiento)
 
 
 # =============================
 #     VENTANA PRINCIPAL
 # =============================
 
-root = tk.Tk()
-root.title("Resolución de ecuaciones trigonométricas")
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Resolución de ecuaciones trigonométricas")
+
+    tk.Label(root, text="Ecuación (ej: sin(x)=0.5):").pack()
+    entrada_ec = tk.Entry(root, width=40)
+    entrada_ec.pack()
 
-tk.Label(root, text="Ecuación (ej: sin(x)=0.5):").pack()
-entrada_ec = tk.Entry(root, width=40)
-entrada_ec.pack()
+    tk.Label(root, text="Rango mínimo (x):").pack()
+    entrada_min = tk.Entry(root, width=20)
+    entrada_min.insert(0, "-6.283")  # -2π
+    entrada_min.pack()
 
-tk.Label(root, text="Rango mínimo (x):").pack()
-entrada_min = tk.Entry(root, width=20)
-entrada_min.insert(0, "-6.283")  # -2π
-entrada_min.pack()
+    tk.Label(root, text="Rango máximo (x):").pack()
+    entrada_max = tk.Entry(root, width=20)
+    entrada_max.insert(0, "6.283")   # 2π
+    entrada_max.pack()
 
-tk.Label(root, text="Rango máximo (x):").pack()
-entrada_max = tk.Entry(root, width=20)
-entrada_max.insert(0, "6.283")   # 2π
-entrada_max.pack()
+    var_numerico = tk.BooleanVar(value=False)
+    tk.Checkbutton(root, text="Buscar las raíces numéricamente", variable=var_numerico).pack()
 
-tk.Button(root, text="Resolver y Graficar", command=ejecutar).pack(pady=10)
+    tk.Button(root, text="Resolver y Graficar", command=ejecutar).pack(pady=10)
+    tk.Button(root, text="Rendimiento", command=ver_rendimiento).pack(pady=(0, 10))
 
-root.mainloop()
+    root.mainloop()
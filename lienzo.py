@@ -0,0 +1,157 @@
+"""
+Gráficas de matplotlib incrustadas en la ventana de Tkinter.
+
+Cada cálculo solía crear una figura nueva con pyplot y abrirla con
+plt.show(), que bloquea y deja figuras vivas en memoria. Aquí la figura, los
+ejes y los artistas (curvas, puntos y líneas verticales) se crean una sola
+vez; al recalcular solo se reemplazan sus datos y se redibujan con blitting
+sobre el fondo guardado. El dibujo completo solo se repite cuando cambian
+los límites de los ejes o los títulos.
+"""
+import tkinter as tk
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+
+from muestreo import rango_y
+
+# Colores de los puntos críticos según su tipo
+COLORES_PUNTOS = {'mínimo': 'green', 'máximo': 'red', 'otro': 'orange'}
+
+
+def calcular_limites(xs, ys, extra_ys=(), margen=0.1):
+    """
+    Límites (x_min, x_max), (y_min, y_max) con un margen, ignorando NaN e infinitos.
+
+    El rango de y lo da muestreo.rango_y, que no deja que los valores
+    enormes junto a un polo aplasten el resto de la curva.
+    """
+    xs = np.asarray(xs, dtype=float)
+    xs_finitos = xs[np.isfinite(xs)]
+    x_min, x_max = (xs_finitos.min(), xs_finitos.max()) if xs_finitos.size else (-10.0, 10.0)
+    if x_max == x_min:
+        x_min, x_max = x_min - 1, x_max + 1
+    y_limites = rango_y(xs, ys, extra_ys, margen=margen) or (-1.0, 1.0)
+    return (float(x_min), float(x_max)), y_limites
+
+
+class GraficaIncrustada:
+    """Figura incrustada en un widget de Tk con artistas reutilizables entre cálculos"""
+
+    def __init__(self, padre, paneles=1, figsize=(8, 6), titulos=(), etiquetas_y=(),
+                 etiquetas_curvas=("f(x)", "f'(x)"), colores=COLORES_PUNTOS, eje_cero=()):
+        # Figure sin pyplot: no queda registrada en el gestor global de figuras
+        self.figura = Figure(figsize=figsize)
+        self.ejes = list(self.figura.subplots(paneles, 1, squeeze=False)[:, 0])
+        # Márgenes fijos: recalcular el diseño en cada dibujo cuesta casi la mitad del tiempo
+        self.figura.subplots_adjust(left=0.1, right=0.97, bottom=0.11, top=0.94, hspace=0.45)
+        self.lienzo = FigureCanvasTkAgg(self.figura, master=padre)
+        self.lienzo.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        self.curvas = []
+        self.puntos = []
+        self.verticales = []
+        self._fondo = None
+        self._redibujar = True
+
+        for i, ax in enumerate(self.ejes):
+            curva, = ax.plot([], [], color='blue' if i == 0 else 'red', linewidth=2,
+                             label=etiquetas_curvas[i], animated=True)
+            self.curvas.append(curva)
+
+            # Un grupo de puntos por tipo, para que la leyenda no cambie entre cálculos
+            grupos = {}
+            if i == 0:
+                for tipo, color in colores.items():
+                    grupos[tipo] = ax.scatter([], [], color=color, s=100, zorder=5,
+                                              label=tipo, animated=True)
+            self.puntos.append(grupos)
+
+            # Líneas verticales de alto completo (x en datos, y en fracción del eje)
+            verticales = LineCollection([], colors='gray', linestyles=':', alpha=0.7,
+                                        transform=ax.get_xaxis_transform(), animated=True)
+            ax.add_collection(verticales)
+            self.verticales.append(verticales)
+
+            if i < len(titulos):
+                ax.set_title(titulos[i])
+            if i < len(etiquetas_y):
+                ax.set_ylabel(etiquetas_y[i])
+            if i in eje_cero:
+                ax.axhline(y=0, color='k', linestyle='--', alpha=0.5)
+            ax.set_xlabel('x')
+            ax.grid(True, alpha=0.3)
+            ax.legend(loc='upper left')
+
+        self.lienzo.mpl_connect('draw_event', self._al_dibujar)
+
+    # ---------- actualización de datos ----------
+
+    def actualizar(self, panel, xs, ys, puntos=None, verticales=(), limites=None):
+        """
+        Reemplaza los datos de un panel sin crear artistas nuevos.
+
+        puntos es un diccionario tipo -> (xs, ys) y verticales una lista de
+        abscisas. Si no se indican limites se calculan a partir de los datos.
+        """
+        ax = self.ejes[panel]
+        self.curvas[panel].set_data(xs, ys)
+
+        extra_ys = []
+        for tipo, grupo in self.puntos[panel].items():
+            px, py = (puntos or {}).get(tipo, ((), ()))
+            grupo.set_offsets(np.column_stack([px, py]) if len(px) else np.empty((0, 2)))
+            extra_ys.extend(py)
+
+        self.verticales[panel].set_segments([[(v, 0), (v, 1)] for v in verticales])
+
+        if limites is None:
+            limites = calcular_limites(xs, ys, extra_ys)
+        (x_min, x_max), (y_min, y_max) = limites
+        if not np.allclose(ax.get_xlim() + ax.get_ylim(), (x_min, x_max, y_min, y_max)):
+            ax.set_xlim(x_min, x_max)
+            ax.set_ylim(y_min, y_max)
+            self._redibujar = True
+
+    def titulo(self, panel, texto):
+        """Cambia el título de un panel (obliga a un dibujo completo si es distinto)"""
+        ax = self.ejes[panel]
+        if ax.get_title() != texto:
+            ax.set_title(texto)
+            self._redibujar = True
+
+    def limpiar(self):
+        """Vacía todos los paneles conservando ejes y artistas"""
+        for panel in range(len(self.ejes)):
+            self.curvas[panel].set_data([], [])
+            for grupo in self.puntos[panel].values():
+                grupo.set_offsets(np.empty((0, 2)))
+            self.verticales[panel].set_segments([])
+        self.dibujar()
+
+    # ---------- dibujo ----------
+
+    def dibujar(self):
+        """Muestra los datos actuales: blitting si el fondo sigue valiendo, si no dibujo completo"""
+        if self._redibujar or self._fondo is None:
+            self._redibujar = False
+            # _al_dibujar guarda el fondo nuevo y pinta encima los artistas
+            self.lienzo.draw_idle()
+            return
+        self.lienzo.restore_region(self._fondo)
+        self._dibujar_artistas()
+        self.lienzo.blit(self.figura.bbox)
+
+    def _al_dibujar(self, evento):
+        """Tras cada dibujo completo (también al cambiar el tamaño) se guarda el fondo"""
+        self._fondo = self.lienzo.copy_from_bbox(self.figura.bbox)
+        self._dibujar_artistas()
+
+    def _dibujar_artistas(self):
+        for panel, ax in enumerate(self.ejes):
+            ax.draw_artist(self.verticales[panel])
+            ax.draw_artist(self.curvas[panel])
+            for grupo in self.puntos[panel].values():
+                ax.draw_artist(grupo)
@@ -0,0 +1,138 @@
+"""
+Muestreo adaptativo de curvas para graficar.
+
+En lugar de evaluar siempre una malla fija (np.linspace con 400, 1000 o 2000
+puntos), se parte de una malla gruesa y solo se subdividen los intervalos
+donde la curva se aparta de la recta entre sus extremos. Las zonas suaves
+quedan con pocos puntos y las zonas empinadas o cercanas a una asíntota
+reciben el resto del presupuesto.
+"""
+import numpy as np
+
+from numerico import evaluar
+
+
+def _percentiles(xs, ys, cuantiles=(5, 95)):
+    """
+    Percentiles de los valores finitos de ys, o None si hay menos de dos.
+
+    Cada muestra pesa el ancho de x que representa: la malla adaptativa
+    amontona puntos junto a los polos, y contarlos uno por uno haría que los
+    valores enormes de esa zona dominen.
+    """
+    finitos = np.isfinite(ys)
+    if np.count_nonzero(finitos) < 2:
+        return None
+    pesos = np.gradient(xs)[finitos] if xs.size > 1 else np.ones(1)
+    valores = ys[finitos]
+    orden = np.argsort(valores)
+    valores, pesos = valores[orden], pesos[orden]
+    acumulado = np.cumsum(pesos) - pesos / 2
+    if not acumulado[-1] > 0:
+        return np.percentile(valores, cuantiles)
+    return np.interp(np.asarray(cuantiles) / 100 * np.sum(pesos), acumulado, valores)
+
+
+def _escala(xs, ys):
+    """Altura típica de la curva, ignorando los valores extremos cerca de polos"""
+    percentiles = _percentiles(xs, ys)
+    if percentiles is None:
+        return 1.0
+    bajo, alto = percentiles
+    return max(alto - bajo, 1e-12)
+
+
+def rango_y(xs, ys, extra_ys=(), holgura=1.0, margen=0.1):
+    """
+    Límites (y_min, y_max) para mostrar la curva sin que los polos la aplasten.
+
+    Se parte de la franja entre los percentiles 5 y 95 (la de _escala), se
+    amplía holgura veces su altura hacia cada lado y se recorta a los valores
+    que toma la curva; extra_ys (por ejemplo los puntos críticos) siempre
+    quedan dentro. Al final se agrega margen veces la altura a cada lado.
+    Devuelve None si no hay ningún valor finito.
+    """
+    xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+    extra_ys = np.asarray(extra_ys, dtype=float).ravel()
+    valores = np.concatenate([ys[np.isfinite(ys)], extra_ys[np.isfinite(extra_ys)]])
+    if valores.size == 0:
+        return None
+
+    y_min, y_max = valores.min(), valores.max()
+    percentiles = _percentiles(xs, ys)
+    if percentiles is not None:
+        bajo, alto = percentiles
+        ancho = (alto - bajo) * holgura
+        extra_ys = extra_ys[np.isfinite(extra_ys)]
+        y_min = min(max(y_min, bajo - ancho), extra_ys.min(initial=np.inf))
+        y_max = max(min(y_max, alto + ancho), extra_ys.max(initial=-np.inf))
+
+    if y_max == y_min:  # Para funciones constantes
+        return float(y_min - 1), float(y_max + 1)
+    y_margen = (y_max - y_min) * margen
+    return float(y_min - y_margen), float(y_max + y_margen)
+
+
+def muestrear_adaptativo(funcion, x_min, x_max, max_puntos=1000, puntos_iniciales=65,
+                         tolerancia=1e-3):
+    """
+    Muestrea funcion en [x_min, x_max] refinando donde la curva es más difícil.
+
+    funcion debe aceptar arreglos de NumPy. Se usan como máximo max_puntos
+    evaluaciones; un intervalo se subdivide mientras su punto medio se aleje
+    de la cuerda más de tolerancia veces la altura de la curva. Devuelve
+    (xs, ys) con NaN entre los dos lados de cada polo para que la línea se corte.
+    """
+    puntos_iniciales = max(2, min(puntos_iniciales, max_puntos))
+    xs = np.linspace(x_min, x_max, puntos_iniciales)
+    ys = evaluar(funcion, xs)
+    ancho_minimo = (x_max - x_min) * 1e-9
+
+    # Intervalos por refinar (índice de su extremo izquierdo) y su prioridad
+    activos = np.arange(xs.size - 1)
+    prioridad = np.full(activos.size, np.inf)
+
+    while activos.size and xs.size < max_puntos:
+        presupuesto = max_puntos - xs.size
+        if activos.size > presupuesto:
+            elegidos = np.sort(np.argsort(-prioridad, kind='stable')[:presupuesto])
+            activos = activos[elegidos]
+
+        medios = (xs[activos] + xs[activos + 1]) / 2
+        y_medios = evaluar(funcion, medios)
+        ya, yb = ys[activos], ys[activos + 1]
+
+        # Error del punto medio respecto a la cuerda, relativo a la altura
+        with np.errstate(all='ignore'):
+            error = np.abs(y_medios - (ya + yb) / 2) / _escala(xs, ys)
+        finitos = np.isfinite(ya) & np.isfinite(yb) & np.isfinite(y_medios)
+        alguno_finito = np.isfinite(ya) | np.isfinite(yb) | np.isfinite(y_medios)
+        # Los bordes del dominio (parte definida, parte no) siempre se refinan
+        error = np.where(finitos, error, np.where(alguno_finito, np.inf, 0.0))
+        error[xs[activos + 1] - xs[activos] < 2 * ancho_minimo] = 0.0
+
+        # Se insertan todos los puntos evaluados; cada inserción desplaza los índices
+        desplazados = activos + np.arange(activos.size)
+        xs = np.insert(xs, activos + 1, medios)
+        ys = np.insert(ys, activos + 1, y_medios)
+
+        refinar = error > tolerancia
+        izquierdos = desplazados[refinar]
+        activos = np.concatenate([izquierdos, izquierdos + 1])
+        prioridad = np.concatenate([error[refinar], error[refinar]])
+        orden = np.argsort(activos)
+        activos, prioridad = activos[orden], prioridad[orden]
+
+    return _cortar_en_polos(xs, ys)
+
+
+def _cortar_en_polos(xs, ys):
+    """Inserta NaN donde la curva salta de un signo al otro con valores enormes"""
+    with np.errstate(all='ignore'):
+        salto = np.abs(np.diff(ys))
+        cambio_signo = np.sign(ys[:-1]) * np.sign(ys[1:]) < 0
+        polos = np.nonzero(cambio_signo & (salto > 10 * _escala(xs, ys)))[0]
+    if polos.size == 0:
+        return xs, ys
+    medios = (xs[polos] + xs[polos + 1]) / 2
+    return np.insert(xs, polos + 1, medios), np.insert(ys, polos + 1, np.nan)
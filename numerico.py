@@ -0,0 +1,79 @@
+"""
+Funciones numéricas compiladas y compartidas.
+
+sp.lambdify genera y ejecuta código fuente cada vez que se llama; aquí cada
+expresión se compila una sola vez y todos los que la necesitan (rango de la
+gráfica, curvas, búsqueda de raíces) reciben la misma función vectorizada.
+"""
+import threading
+import time
+
+import numpy as np
+
+from cache import CacheLRU
+from perezoso import ModuloPerezoso
+
+# sympy solo se importa al compilar la primera expresión (que ya viene de sympy)
+sp = ModuloPerezoso('sympy')
+
+_COMPILADAS = CacheLRU(max_tamano=256)
+_tiempos = {'compilacion': 0.0, 'ahorrado': 0.0}
+_candado = threading.Lock()
+
+
+def _constante(valor):
+    """Función vectorizada que devuelve un arreglo lleno con un valor constante"""
+    def evaluar(valores):
+        return np.full(np.shape(valores), valor)
+    return evaluar
+
+
+def compilar(expr, x, modulo='numpy'):
+    """Devuelve la función numérica vectorizada de expr, compilándola una sola vez"""
+    clave = (expr, x, modulo)
+    entrada = _COMPILADAS.obtener(clave)
+    if entrada is not None:
+        funcion, costo = entrada
+        with _candado:
+            _tiempos['ahorrado'] += costo
+        return funcion
+
+    inicio = time.perf_counter()
+    funcion = sp.lambdify(x, expr, modulo)
+    # lambdify de una constante devuelve un escalar; se amplía al tamaño de la entrada
+    if x not in sp.sympify(expr).free_symbols:
+        funcion = _constante(funcion(0))
+    costo = time.perf_counter() - inicio
+
+    _COMPILADAS.guardar(clave, (funcion, costo))
+    with _candado:
+        _tiempos['compilacion'] += costo
+    return funcion
+
+
+def evaluar(funcion, valores):
+    """Evalúa una función compilada y devuelve un arreglo real (NaN donde no está definida)"""
+    with np.errstate(all='ignore'):
+        resultado = np.asarray(funcion(valores))
+        if np.iscomplexobj(resultado):
+            resultado = np.where(np.abs(resultado.imag) < 1e-12, resultado.real, np.nan)
+        resultado = np.asarray(resultado, dtype=float)
+    if resultado.shape != np.shape(valores):
+        resultado = np.broadcast_to(resultado, np.shape(valores)).astype(float)
+    return resultado
+
+
+def estadisticas_compilacion():
+    """Devuelve aciertos, fallos y el tiempo de compilación gastado y ahorrado"""
+    datos = _COMPILADAS.estadisticas()
+    with _candado:
+        datos['tiempo_compilacion'] = _tiempos['compilacion']
+        datos['tiempo_ahorrado'] = _tiempos['ahorrado']
+    return datos
+
+
+def limpiar_compiladas():
+    """Descarta las funciones compiladas y reinicia los contadores"""
+    _COMPILADAS.limpiar()
+    with _candado:
+        _tiempos['compilacion'] = _tiempos['ahorrado'] = 0.0
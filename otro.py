@@ -1,9 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-import matplotlib.pyplot as plt
-import sympy as sp
-from sympy import symbols, solve, sympify, Eq, lambdify, pi
+
+import periodicas
+from expresiones import a_grados, parsear_ecuacion
+from muestreo import muestrear_adaptativo, rango_y
+from numerico import compilar
+from perezoso import ModuloPerezoso
+from rendimiento import Rendimiento, medir
+
+# La ventana abre sin esperar a sympy ni a matplotlib: se cargan al resolver
+sp = ModuloPerezoso('sympy')
+plt = ModuloPerezoso('matplotlib.pyplot')
+
+# Ecuaciones de los botones de ejemplo
+EJEMPLOS = [
+    "sin(x) = 0.5",
+    "2*cos(x) + sqrt(3) = 0",
+    "tan(x) = 1",
+    "sin(2*x) - sin(x) = 0",
+    "cos(x) - 2*cos(x)*sin(x) = 0"
+]
 
 # =============================
 #     FUNCIONES DE CONVERSIÓN
@@ -13,118 +30,112 @@ def radianes_a_grados(rad):
     """Convierte radianes a grados"""
     return rad * 180 / np.pi
 
-def grados_a_radianes(grados):
-    """Convierte grados a radianes"""
-    return grados * np.pi / 180
-
 # =============================
 #     RESOLVER ECUACIÓN
 # =============================
 
-def resolver_ecuacion_trig(ec_str, xmin, xmax, en_grados=True):
+def resolver_ecuacion_trig(ec_str, xmin, xmax, en_grados=True, rendimiento=None,
+                           metodo='simbolico', multiplicidad=False):
     """
     Resuelve ecuación trigonométrica en el rango dado
     Devuelve soluciones en grados o radianes según parámetro
+    Si se pasa un Rendimiento, se mide cada etapa (parseo, resolución, expansión)
+    Con metodo='numerico' las raíces se buscan en una malla, sin sympy.solveset;
+    en grados la búsqueda se hace sobre la expresión ya reescrita en grados
+    Con multiplicidad=True cada solución es un par (valor, multiplicidad)
     """
-    x = symbols('x')
+    x = sp.symbols('x')
+    escala = radianes_a_grados(1.0) if en_grados else 1.0
 
     # Pasar ecuación en texto a SymPy
-    try:
-        if "=" in ec_str:
-            lado_izq, lado_der = ec_str.split("=")
-            expr = sympify(lado_izq) - sympify(lado_der)
-        else:
-            expr = sympify(ec_str)
-    except Exception as e:
-        return None, f"Error al interpretar la ecuación: {e}"
-
-    # Solución simbólica
-    try:
-        soluciones = solve(Eq(expr, 0), x)
-    except Exception as e:
-        return None, f"Error al resolver la ecuación: {e}"
-
-    # Procesar soluciones
-    soluciones_finales = []
-    for sol in soluciones:
+    with medir(rendimiento, 'parseo') as medicion:
         try:
-            # Si es una expresión con n (solución general)
-            if sol.has(sp.Symbol):
-                n = symbols('n', integer=True)
-                # Probar valores de n para encontrar soluciones en el rango
-                for k in range(-10, 11):
-                    try:
-                        s_eval = sol.subs(n, k)
-                        if s_eval.is_real:
-                            val = float(s_eval)
-                            # Convertir a grados si se solicita
-                            if en_grados:
-                                val = radianes_a_grados(val)
-                            if xmin <= val <= xmax:
-                                soluciones_finales.append(val)
-                    except:
-                        continue
-            else:
-                # Solución numérica directa
-                val = float(sol)
-                if en_grados:
-                    val = radianes_a_grados(val)
-                if xmin <= val <= xmax:
-                    soluciones_finales.append(val)
-                    
+            expr = medicion.valor = parsear_ecuacion(ec_str)
         except Exception as e:
-            print(f"Advertencia: No se pudo procesar solución {sol}: {e}")
-
-    # Eliminar duplicados y ordenar
-    soluciones_finales = sorted(set([round(s, 5) for s in soluciones_finales]))
-    
-    return soluciones_finales, None
+            medicion.estado = 'error'
+            return None, f"Error al interpretar la ecuación: {e}"
+
+    if metodo == 'numerico':
+        with medir(rendimiento, 'busqueda') as medicion:
+            try:
+                # La malla y las raíces quedan en grados, sin convertir arreglos
+                buscada = a_grados(expr, x) if en_grados else expr
+                soluciones = periodicas.raices_numericas(buscada, x, xmin, xmax).tolist()
+            except ValueError as e:
+                medicion.estado = 'error'
+                return None, str(e)
+    else:
+        # Solución simbólica
+        with medir(rendimiento, 'resolucion') as medicion:
+            try:
+                # solveset da las familias completas (ImageSet), no solo las principales.
+                # Se resuelve en radianes: con x en grados solveset tarda más, y
+                # pasar las familias a grados solo escala a y p, no cada raíz
+                conjunto = medicion.valor = sp.solveset(expr, x, sp.S.Reals)
+            except Exception as e:
+                medicion.estado = 'error'
+                return None, f"Error al resolver la ecuación: {e}"
+
+        with medir(rendimiento, 'expansion') as medicion:
+            try:
+                soluciones = _expandir_soluciones(conjunto, expr, x, xmin, xmax, en_grados)
+            except ValueError as e:
+                medicion.estado = 'error'
+                return None, str(e)
+
+    if multiplicidad:
+        with medir(rendimiento, 'multiplicidad'):
+            soluciones = list(zip(soluciones, periodicas.multiplicidad(expr, x, soluciones,
+                                                                       escala=escala)))
+    return soluciones, None
+
+def texto_multiplicidad(m):
+    """Aclaración que se muestra junto a una raíz múltiple"""
+    nombres = {1: "", 2: " (doble)", 3: " (triple)"}
+    return nombres.get(m, f" (multiplicidad {m})")
+
+def _expandir_soluciones(soluciones, expr, x, xmin, xmax, en_grados):
+    """Valores numéricos de las soluciones (y de sus familias periódicas) en [xmin, xmax]"""
+    # El rango se recorta ya en las unidades pedidas
+    escala = radianes_a_grados(1.0) if en_grados else 1.0
+    return periodicas.raices_en_rango(soluciones, expr, x, xmin, xmax, escala=escala).tolist()
 
 # =============================
 #        GRAFICAR
 # =============================
 
-def graficar(ec_str, xmin, xmax, soluciones, en_grados=True):
+def graficar(ec_str, xmin, xmax, soluciones, en_grados=True, rendimiento=None):
     """
     Grafica la ecuación y marca las soluciones
     """
-    x = symbols('x')
+    x = sp.symbols('x')
 
     try:
-        if "=" in ec_str:
-            lado_izq, lado_der = ec_str.split("=")
-            expr = sympify(lado_izq) - sympify(lado_der)
-        else:
-            expr = sympify(ec_str)
+        # Ya se interpretó al resolver: sale del cache
+        expr = parsear_ecuacion(ec_str)
     except Exception as e:
         messagebox.showerror("Error", f"Error al interpretar ecuación: {e}")
         return
 
-    # Convertir a función numérica
-    f = lambdify(x, expr, "numpy")
-
-    # Crear puntos para graficar
-    if en_grados:
-        # Convertir rango a radianes para evaluación
-        X_rad = np.linspace(grados_a_radianes(xmin), grados_a_radianes(xmax), 2000)
-        Y = f(X_rad)
-        # Convertir de vuelta a grados para el eje X
-        X_plot = radianes_a_grados(X_rad)
-        xlabel = "x (grados)"
-    else:
-        X_plot = np.linspace(xmin, xmax, 2000)
-        Y = f(X_plot)
-        xlabel = "x (radianes)"
+    with medir(rendimiento, 'muestreo'):
+        # Convertir a función numérica; en grados se compila la expresión
+        # reescrita, así que los puntos se evalúan y se grafican tal cual
+        f = compilar(a_grados(expr, x) if en_grados else expr, x)
+        X_plot, Y = muestrear_adaptativo(f, xmin, xmax, max_puntos=2000)
+        # Sin que las asíntotas (tan, sec, ...) aplasten la curva; el eje y = 0 siempre se ve
+        y_min, y_max = rango_y(X_plot, Y, [0])
+        xlabel = "x (grados)" if en_grados else "x (radianes)"
 
     plt.figure(figsize=(10, 6))
     plt.axhline(0, color="black", linewidth=1)
     plt.plot(X_plot, Y, label=f"{ec_str}", linewidth=2)
+    plt.ylim(y_min, y_max)
 
     # Marcar soluciones
     if soluciones:
         for s in soluciones:
             plt.scatter([s], [0], color="red", zorder=5, s=50)
-            plt.text(s, 0.1 * max(Y) if max(Y) > 0 else 0.1 * min(Y), 
+            plt.text(s, 0.1 * y_max if y_max > 0 else 0.1 * y_min, 
                     f"{s:.2f}°" if en_grados else f"{s:.3f}", 
                     fontsize=10, ha='center', bbox=dict(boxstyle="round,pad=0.3", facecolor="yellow", alpha=0.7))
 
@@ -140,10 +151,27 @@ def graficar(ec_str, xmin, xmax, soluciones, en_grados=True):
 #       FUNCIÓN PRINCIPAL
 # =============================
 
+# Mediciones de la última resolución, para la ventana de rendimiento
+ultimo_rendimiento = None
+
+def ver_rendimiento():
+    """
+    Muestra el tiempo de cada etapa de la última resolución
+    """
+    if ultimo_rendimiento is None:
+        messagebox.showinfo("Rendimiento", "Aún no se ha resuelto ninguna ecuación.")
+        return
+    ventana = tk.Toplevel()
+    ventana.title("Rendimiento")
+    texto = tk.Text(ventana, width=90, height=14, wrap=tk.NONE, font=("Courier New", 9))
+    texto.pack(fill=tk.BOTH, expand=True)
+    texto.insert("end", ultimo_rendimiento.resumen())
+
 def ejecutar():
     """
     Función principal que ejecuta la resolución y graficación
     """
+    global ultimo_rendimiento
     ec = entrada_ec.get().strip()
     if not ec:
         messagebox.showerror("Error", "Por favor ingrese una ecuación.")
@@ -159,23 +187,29 @@ def ejecutar():
     # Determinar si usar grados o radianes
     en_grados = var_grados.get()
 
-    soluciones, error = resolver_ecuacion_trig(ec, xmin, xmax, en_grados)
+    metodo = 'numerico' if var_numerico.get() else 'simbolico'
+
+    ultimo_rendimiento = Rendimiento()
+    resultado, error = resolver_ecuacion_trig(ec, xmin, xmax, en_grados, ultimo_rendimiento,
+                                              metodo, multiplicidad=True)
 
     if error:
         messagebox.showerror("Error", error)
         return
+    soluciones = [s for s, _ in resultado]
 
     # Mostrar resultados
     if not soluciones:
         messagebox.showinfo("Soluciones", "No se encontraron soluciones en este rango.")
     else:
         unidad = "°" if en_grados else " rad"
-        soluciones_str = "\n".join([f"x = {s:.4f}{unidad}" for s in soluciones])
+        soluciones_str = "\n".join([f"x = {s:.4f}{unidad}{texto_multiplicidad(m)}"
+                                    for s, m in resultado])
         messagebox.showinfo("Soluciones encontradas", 
                           f"Se encontraron {len(soluciones)} soluciones:\n\n{soluciones_str}")
 
     # Graficar
-    graficar(ec, xmin, xmax, soluciones, en_grados)
+    graficar(ec, xmin, xmax, soluciones, en_grados, ultimo_rendimiento)
 
 # =============================
 #     INTERFAZ GRÁFICA MEJORADA
@@ -238,6 +272,12 @@ def crear_interfaz():
                                   variable=var_grados)
     check_grados.pack(anchor=tk.W, pady=(10, 0))
 
+    # Método numérico: más rápido en ecuaciones que sympy tarda en resolver
+    global var_numerico
+    var_numerico = tk.BooleanVar(value=False)
+    ttk.Checkbutton(frame_rango, text="Buscar las raíces numéricamente",
+                    variable=var_numerico).pack(anchor=tk.W)
+
     # Frame para botones
     frame_botones = ttk.Frame(main_frame)
     frame_botones.pack(fill=tk.X, pady=20)
@@ -245,20 +285,13 @@ def crear_interfaz():
     btn_resolver = ttk.Button(frame_botones, text="Resolver y Graficar", 
                              command=ejecutar, style="Accent.TButton")
     btn_resolver.pack(pady=10)
+    ttk.Button(frame_botones, text="Rendimiento", command=ver_rendimiento).pack()
 
     # Ejemplos
     frame_ejemplos = ttk.LabelFrame(main_frame, text="Ejemplos", padding="10")
     frame_ejemplos.pack(fill=tk.BOTH, expand=True, pady=5)
 
-    ejemplos = [
-        "sin(x) = 0.5",
-        "2*cos(x) + sqrt(3) = 0", 
-        "tan(x) = 1",
-        "sin(2*x) - sin(x) = 0",
-        "cos(x) - 2*cos(x)*sin(x) = 0"
-    ]
-
-    for i, ejemplo in enumerate(ejemplos):
+    for i, ejemplo in enumerate(EJEMPLOS):
         btn_ejemplo = ttk.Button(frame_ejemplos, text=ejemplo,
                                 command=lambda e=ejemplo: entrada_ec.delete(0, tk.END) or entrada_ec.insert(0, e))
         btn_ejemplo.pack(fill=tk.X, pady=2)
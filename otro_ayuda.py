@@ -1,12 +1,18 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-import matplotlib.pyplot as plt
-import sympy as sp
-from sympy import symbols, solve, sympify, Eq, lambdify, pi
 import os
 from pathlib import Path
 
+from expresiones import a_grados, parsear_ecuacion
+from muestreo import muestrear_adaptativo, rango_y
+from numerico import compilar
+from perezoso import ModuloPerezoso
+
+# La ventana abre sin esperar a sympy ni a matplotlib: se cargan al resolver
+sp = ModuloPerezoso('sympy')
+plt = ModuloPerezoso('matplotlib.pyplot')
+
 # =============================
 #     CONFIGURACIÓN DE GUARDADO
 # =============================
@@ -40,10 +46,6 @@ def radianes_a_grados(rad):
     """Convierte radianes a grados"""
     return rad * 180 / np.pi
 
-def grados_a_radianes(grados):
-    """Convierte grados a radianes"""
-    return grados * np.pi / 180
-
 # =============================
 #     RESOLVER ECUACIÓN
 # =============================
@@ -53,21 +55,17 @@ def resolver_ecuacion_trig(ec_str, xmin, xmax, en_grados=True):
     Resuelve ecuación trigonométrica en el rango dado
     Devuelve soluciones en grados o radianes según parámetro
     """
-    x = symbols('x')
+    x = sp.symbols('x')
 
     # Pasar ecuación en texto a SymPy
     try:
-        if "=" in ec_str:
-            lado_izq, lado_der = ec_str.split("=")
-            expr = sympify(lado_izq) - sympify(lado_der)
-        else:
-            expr = sympify(ec_str)
+        expr = parsear_ecuacion(ec_str)
     except Exception as e:
         return None, f"Error al interpretar la ecuación: {e}"
 
     # Solución simbólica
     try:
-        soluciones = solve(Eq(expr, 0), x)
+        soluciones = sp.solve(sp.Eq(expr, 0), x)
     except Exception as e:
         return None, f"Error al resolver la ecuación: {e}"
 
@@ -77,7 +75,7 @@ def resolver_ecuacion_trig(ec_str, xmin, xmax, en_grados=True):
         try:
             # Si es una expresión con n (solución general)
             if sol.has(sp.Symbol):
-                n = symbols('n', integer=True)
+                n = sp.symbols('n', integer=True)
                 # Probar valores de n para encontrar soluciones en el rango
                 for k in range(-10, 11):
                     try:
@@ -115,44 +113,34 @@ def graficar(ec_str, xmin, xmax, soluciones, en_grados=True):
     """
     Grafica la ecuación, marca las soluciones y guarda la imagen
     """
-    x = symbols('x')
+    x = sp.symbols('x')
 
     try:
-        if "=" in ec_str:
-            lado_izq, lado_der = ec_str.split("=")
-            expr = sympify(lado_izq) - sympify(lado_der)
-        else:
-            expr = sympify(ec_str)
+        # Ya se interpretó al resolver: sale del cache
+        expr = parsear_ecuacion(ec_str)
     except Exception as e:
         messagebox.showerror("Error", f"Error al interpretar ecuación: {e}")
         return None
 
-    # Convertir a función numérica
-    f = lambdify(x, expr, "numpy")
-
-    # Crear puntos para graficar
-    if en_grados:
-        # Convertir rango a radianes para evaluación
-        X_rad = np.linspace(grados_a_radianes(xmin), grados_a_radianes(xmax), 2000)
-        Y = f(X_rad)
-        # Convertir de vuelta a grados para el eje X
-        X_plot = radianes_a_grados(X_rad)
-        xlabel = "x (grados)"
-    else:
-        X_plot = np.linspace(xmin, xmax, 2000)
-        Y = f(X_plot)
-        xlabel = "x (radianes)"
+    # Convertir a función numérica; en grados se compila la expresión
+    # reescrita, así que los puntos se evalúan y se grafican tal cual
+    f = compilar(a_grados(expr, x) if en_grados else expr, x)
+    X_plot, Y = muestrear_adaptativo(f, xmin, xmax, max_puntos=2000)
+    # Sin que las asíntotas (tan, sec, ...) aplasten la curva; el eje y = 0 siempre se ve
+    y_min, y_max = rango_y(X_plot, Y, [0])
+    xlabel = "x (grados)" if en_grados else "x (radianes)"
 
     # Crear figura
     plt.figure(figsize=(12, 6))
     plt.axhline(0, color="black", linewidth=1)
     plt.plot(X_plot, Y, label=f"{ec_str}", linewidth=2, color='blue')
+    plt.ylim(y_min, y_max)
 
     # Marcar soluciones
     if soluciones:
         for s in soluciones:
             plt.scatter([s], [0], color="red", zorder=5, s=80, edgecolors='black')
-            offset_y = 0.1 * (max(Y) - min(Y)) if max(Y) != min(Y) else 0.1
+            offset_y = 0.1 * (y_max - y_min)
             plt.text(s, offset_y, 
                     f"{s:.2f}°" if en_grados else f"{s:.3f}", 
                     fontsize=11, ha='center', 
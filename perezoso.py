@@ -0,0 +1,41 @@
+"""
+Importación perezosa de los módulos pesados.
+
+Importar sympy tarda más de un segundo y matplotlib.pyplot o PIL varias
+décimas; los programas los importaban al arrancar aunque el usuario todavía
+no hubiera pedido ningún cálculo. ModuloPerezoso se coloca donde antes iba el
+import y solo carga el módulo real la primera vez que se usa uno de sus
+atributos, así que el resto del código sigue escribiendo sp.Symbol(...) o
+plt.figure(...) sin cambios.
+"""
+import importlib
+import sys
+import threading
+
+
+class ModuloPerezoso:
+    """Representa un módulo que se importa al acceder a su primer atributo"""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+        self._modulo = None
+        self._candado = threading.Lock()
+
+    def cargar(self):
+        """Importa el módulo real (una sola vez) y lo devuelve"""
+        if self._modulo is None:
+            with self._candado:
+                if self._modulo is None:
+                    self._modulo = importlib.import_module(self._nombre)
+        return self._modulo
+
+    def cargado(self):
+        """Indica si el módulo ya está importado, aquí o en cualquier otra parte"""
+        return self._modulo is not None or self._nombre in sys.modules
+
+    def __getattr__(self, atributo):
+        return getattr(self.cargar(), atributo)
+
+    def __repr__(self):
+        estado = "cargado" if self.cargado() else "sin cargar"
+        return f"<módulo perezoso '{self._nombre}' ({estado})>"
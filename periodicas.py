@@ -0,0 +1,179 @@
+"""
+Expansión de las soluciones periódicas de una ecuación.
+
+Cada solución se describe como una familia a + p*k (k entero): a es una
+solución particular y p el periodo (0 si la solución es aislada). En lugar de
+sustituir k = -10..10 en la expresión simbólica y convertir cada resultado con
+float(), se calcula aritméticamente qué valores de k caen en [xmin, xmax] y se
+generan todas las raíces de una vez como un arreglo de NumPy. Así el costo es
+proporcional al número de raíces y no se pierden soluciones en rangos amplios.
+"""
+import math
+
+import numpy as np
+
+from numerico import compilar
+from perezoso import ModuloPerezoso
+from raices import MENSAJE_INTERVALO, buscar_raices, multiplicidades
+
+sp = ModuloPerezoso('sympy')
+
+# Más raíces que esto indican un rango desproporcionado para el periodo
+MAX_RAICES = 1_000_000
+
+
+def periodo_minimo(expr, x):
+    """
+    Menor periodo de las funciones trigonométricas de expr, o None si no tiene.
+
+    Es lo que marca qué tan fina debe ser la malla de la búsqueda numérica.
+    Solo se leen los argumentos lineales (sin(a*x + b) tiene periodo 2*pi/|a|),
+    sin simplificar nada: sympy.periodicity simplifica la expresión y tarda
+    mucho más que la búsqueda misma.
+    """
+    periodos = []
+    for funcion, base in ((sp.sin, 2), (sp.cos, 2), (sp.sec, 2), (sp.csc, 2),
+                          (sp.tan, 1), (sp.cot, 1)):
+        for atomo in expr.atoms(funcion):
+            pendiente = atomo.args[0].diff(x)
+            if pendiente.is_number and pendiente != 0:
+                periodos.append(base * float(sp.pi) / abs(float(pendiente)))
+    return min(periodos) if periodos else None
+
+
+def familia(sol, p=0.0, n=None):
+    """
+    Convierte una solución simbólica en (a, p), o None si no es real.
+
+    Si la solución depende de un parámetro entero n (por ejemplo
+    2*n*pi + pi/6) el periodo es su coeficiente; si es un número, la familia
+    usa el periodo p de la ecuación.
+    """
+    if n is None:
+        libres = [s for s in getattr(sol, 'free_symbols', ()) if s.is_integer]
+        n = libres[0] if len(libres) == 1 else None
+    try:
+        if n is not None and sol.has(n):
+            paso = sol.diff(n)
+            if paso.free_symbols:
+                return None
+            return float(sol.subs(n, 0)), abs(float(paso))
+        return float(sol), p
+    except (TypeError, ValueError):
+        # Solución compleja o con otros símbolos libres
+        return None
+
+
+def familias(soluciones, p=0.0):
+    """Familias (a, p) de las soluciones reales; p es el periodo de la ecuación"""
+    resultado = []
+    for sol in soluciones:
+        fam = familia(sol, p)
+        if fam is not None:
+            resultado.append(fam)
+    return resultado
+
+
+def familias_de_conjunto(conjunto):
+    """
+    Familias (a, p) de un conjunto devuelto por solveset sobre los reales.
+
+    Se descomponen las uniones, los conjuntos finitos y los ImageSet de la
+    forma {a + p*n | n en Z}. Devuelve None si el conjunto no se puede
+    enumerar así (un ConditionSet, un intervalo, un complemento, ...).
+    """
+    if conjunto is sp.S.EmptySet:
+        return []
+    if isinstance(conjunto, sp.Union):
+        resultado = []
+        for parte in conjunto.args:
+            partes = familias_de_conjunto(parte)
+            if partes is None:
+                return None
+            resultado.extend(partes)
+        return resultado
+    if isinstance(conjunto, sp.FiniteSet):
+        # Las soluciones complejas se descartan, igual que en familias()
+        return familias(conjunto.args)
+    if isinstance(conjunto, sp.ImageSet) and conjunto.base_set is sp.S.Integers:
+        n, = conjunto.lamda.variables
+        fam = familia(conjunto.lamda.expr, n=n)
+        if fam is None or fam[1] == 0:
+            return None
+        return [fam]
+    return None
+
+
+def expandir(familias, xmin, xmax, escala=1.0, decimales=5, max_raices=MAX_RAICES):
+    """
+    Todas las raíces a + p*k de las familias dentro de [xmin, xmax].
+
+    escala convierte a las unidades del rango antes de recortar (por ejemplo
+    180/pi para trabajar en grados). Devuelve un arreglo ordenado y sin
+    repetidos, redondeado a decimales.
+    """
+    bloques = []
+    total = 0
+    for a, p in familias:
+        a, p = a * escala, p * escala
+        if p == 0:
+            bloques.append(np.array([a]))
+            continue
+        # Un margen pequeño para no perder raíces que caen justo en un extremo
+        k_min = math.ceil((xmin - a) / p - 1e-9)
+        k_max = math.floor((xmax - a) / p + 1e-9)
+        if k_max < k_min:
+            continue
+        total += k_max - k_min + 1
+        if total > max_raices:
+            raise ValueError(f"El rango contiene más de {max_raices} soluciones; redúzcalo")
+        bloques.append(a + p * np.arange(k_min, k_max + 1))
+    if not bloques:
+        return np.empty(0)
+    raices = np.concatenate(bloques)
+    # Se redondea antes de recortar: 360.0000000001 cuenta como 360
+    raices = np.round(raices, decimales)
+    return np.unique(raices[(raices >= xmin) & (raices <= xmax)])
+
+
+def raices_en_rango(conjunto, expr, x, xmin, xmax, escala=1.0):
+    """
+    Raíces de expr = 0 en [xmin, xmax] a partir del conjunto que dio solveset.
+
+    Si el conjunto se descompone en familias a + p*k se enumeran sin más
+    cálculo simbólico; si no (por ejemplo un ConditionSet) se buscan las
+    raíces numéricamente. escala tiene el mismo sentido que en expandir().
+    """
+    if isinstance(conjunto, sp.Interval):
+        raise ValueError(MENSAJE_INTERVALO)
+    fams = familias_de_conjunto(conjunto)
+    if fams is not None:
+        return expandir(fams, xmin, xmax, escala=escala)
+    return raices_numericas(expr, x, xmin, xmax, escala=escala)
+
+
+def raices_numericas(expr, x, xmin, xmax, escala=1.0):
+    """
+    Raíces de expr = 0 en [xmin, xmax] sin resolver nada simbólicamente.
+
+    Solo se compilan la expresión y su derivada; la malla se ajusta al menor
+    periodo de sus funciones trigonométricas. escala tiene el mismo sentido que
+    en expandir().
+    """
+    encontradas = buscar_raices(compilar(expr, x), xmin / escala, xmax / escala,
+                                derivada=compilar(sp.diff(expr, x), x),
+                                periodo=periodo_minimo(expr, x), decimales=12)
+    return np.unique(np.round(encontradas * escala, 5))
+
+
+def multiplicidad(expr, x, valores, escala=1.0, max_orden=4, tolerancia=1e-3):
+    """
+    Multiplicidad de cada raíz (en las unidades de escala) según las derivadas de expr.
+
+    Las raíces llegan redondeadas a 5 decimales, así que en una raíz doble la
+    derivada no vale exactamente cero; por eso la tolerancia es mucho mayor
+    que la de raices.multiplicidades.
+    """
+    derivadas = [compilar(sp.diff(expr, x, orden), x) for orden in range(1, max_orden + 1)]
+    return multiplicidades(derivadas, np.asarray(valores, dtype=float) / escala,
+                           tolerancia).tolist()
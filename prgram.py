@@ -1,55 +1,189 @@
 import re
+from array import array
+from functools import lru_cache
 import tkinter as tk
 from tkinter import messagebox, Toplevel, scrolledtext
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
+
+from perezoso import ModuloPerezoso
+
+# pyplot se carga al graficar por primera vez; la proyección "3d" la registra
+# matplotlib por sí solo, sin importar Axes3D
+plt = ModuloPerezoso('matplotlib.pyplot')
 
 
 # -----------------------------------
 #   PARSER DE ECUACIONES LINEALES
 # -----------------------------------
+# Un número: 3, 2.5, .5, 1e-3
+_NUMERO = r"(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+# Cada coincidencia es un término completo (signo, coeficiente, variable y
+# divisores opcionales) o, en el último grupo, un '=', un fin de ecuación,
+# un comentario o un carácter inválido. Así el texto se recorre una sola vez
+# con el motor de expresiones regulares, sin partirlo en cadenas intermedias.
+_TOKEN = re.compile(rf"""
+    [ \t\r]*
+    (?:
+        (?=[+-]?[ \t]*(?:\d|\.\d|[A-Za-z_]))
+        ([+-]?)[ \t]*
+        ({_NUMERO})?(?:[ \t]*/[ \t]*({_NUMERO}))?
+        [ \t]*(?:\*[ \t]*(?=[A-Za-z_]))?
+        ([A-Za-z_]\w*)?
+        (?:[ \t]*/[ \t]*({_NUMERO}))?
+      | (\#[^\n]*|[\n;=]|\S)
+    )
+""", re.VERBOSE)
+
+
+def _parsear_texto(texto, variables=None):
+    """
+    Recorre el texto una sola vez y devuelve los coeficientes en forma dispersa.
+
+    Las ecuaciones se separan con saltos de línea o ';' y los sistemas con
+    una línea en blanco; '#' inicia un comentario. Cada término se guarda
+    como (ecuación, columna, valor) en arreglos compactos, con la columna 0
+    para el término independiente. Si se dan las variables, cualquier otra
+    es un error; si no, se numeran en el orden en que aparecen.
+
+    Devuelve (filas, columnas, valores, ecuaciones por sistema, variables).
+    """
+    fijas = variables is not None
+    indices = {nombre: i + 1 for i, nombre in enumerate(variables or ())}
+    filas, columnas, valores = array('l'), array('l'), array('d')
+    tamanos = []
+
+    ecuacion = 0        # número de ecuaciones terminadas
+    en_sistema = 0      # ecuaciones del sistema en curso
+    linea = 1
+    linea_vacia = True  # la línea actual no tiene nada, ni un comentario
+    lado = 1.0          # 1 a la izquierda del '=', -1 a la derecha
+    igual = False
+    terminos = 0        # términos del lado actual
+
+    for signo, num, den, var, den2, otro in _TOKEN.findall(texto):
+        if not otro:
+            if terminos and not signo:
+                raise ValueError(f"Línea {linea}: falta un operador antes de "
+                                 f"'{num}{var}'")
+            valor = float(num) if num else 1.0
+            if den:
+                valor /= float(den)
+            if den2:
+                valor /= float(den2)
+            if signo == '-':
+                valor = -valor
+            if var:
+                columna = indices.get(var)
+                if columna is None:
+                    if fijas:
+                        raise ValueError(f"Línea {linea}: variable desconocida '{var}'")
+                    columna = indices[var] = len(indices) + 1
+                valor *= lado
+            else:
+                # La constante pasa al otro lado del '='
+                columna, valor = 0, -lado * valor
+            filas.append(ecuacion)
+            columnas.append(columna)
+            valores.append(valor)
+            terminos += 1
+        elif otro == '\n' or otro == ';':
+            if igual or terminos:
+                if not igual:
+                    raise ValueError(f"Línea {linea}: la ecuación debe incluir '='")
+                if not terminos:
+                    raise ValueError(f"Línea {linea}: falta el lado derecho de la ecuación")
+                ecuacion += 1
+                en_sistema += 1
+            elif otro == '\n' and linea_vacia and en_sistema:
+                tamanos.append(en_sistema)
+                en_sistema = 0
+            lado, igual, terminos = 1.0, False, 0
+            if otro == '\n':
+                linea += 1
+                linea_vacia = True
+            continue
+        elif otro == '=':
+            if igual:
+                raise ValueError(f"Línea {linea}: la ecuación tiene más de un '='")
+            if not terminos:
+                raise ValueError(f"Línea {linea}: falta el lado izquierdo de la ecuación")
+            lado, igual, terminos = -1.0, True, 0
+        elif otro == '*':
+            # El '*' solo puede ir entre un coeficiente y su variable ("2*x")
+            raise ValueError(f"Línea {linea}: falta la variable después de '*'")
+        elif otro[0] != '#':
+            raise ValueError(f"Línea {linea}: término inválido cerca de '{otro}'")
+        linea_vacia = False
+
+    if igual or terminos:
+        if not igual:
+            raise ValueError(f"Línea {linea}: la ecuación debe incluir '='")
+        if not terminos:
+            raise ValueError(f"Línea {linea}: falta el lado derecho de la ecuación")
+        ecuacion += 1
+        en_sistema += 1
+    if en_sistema:
+        tamanos.append(en_sistema)
+    return filas, columnas, valores, tamanos, list(indices)
+
+
+# Las ecuaciones son lineales: no hace falta sympy (ver expresiones.parsear).
+# Reintentar la misma ecuación sale del cache.
+@lru_cache(maxsize=256)
 def parsear(ec):
-    ec = ec.replace(" ", "")
-
-    if "=" not in ec:
-        raise ValueError("La ecuación debe incluir '='")
-
-    izq, der = ec.split("=")
-    d = float(der)
+    """Coeficientes (a, b, c, d) de una ecuación 'ax + by + cz = d'"""
+    _, columnas, valores, tamanos, _ = _parsear_texto(ec, ('x', 'y', 'z'))
+    if tamanos != [1]:
+        raise ValueError("Se esperaba una sola ecuación" if tamanos
+                         else "La ecuación debe incluir '='")
+    coeficientes = [0.0, 0.0, 0.0, 0.0]
+    for columna, valor in zip(columnas, valores):
+        coeficientes[columna] += valor
+    d, a, b, c = coeficientes
+    return a, b, c, d
 
-    izq = izq.replace("-", "+-")
-    if izq[0] == "+":
-        izq = izq[1:]
 
-    terminos = izq.split("+")
+def _aumentada(texto, variables=None):
+    """Matriz aumentada de todas las ecuaciones, ecuaciones por sistema y variables"""
+    filas, columnas, valores, tamanos, nombres = _parsear_texto(texto, variables)
+    ancho = len(nombres) + 1
+    posiciones = np.asarray(filas, dtype=np.int64) * ancho + np.asarray(columnas, dtype=np.int64)
+    matriz = np.bincount(posiciones, weights=np.asarray(valores, dtype=float),
+                         minlength=sum(tamanos) * ancho).reshape(sum(tamanos), ancho)
+    # La columna 0 (constante) pasa al final, como en una matriz aumentada
+    return np.roll(matriz, -1, axis=1), tamanos, nombres
 
-    a = b = c = 0.0
-    patron = re.compile(r"([+-]?\d*\.?\d*)(x|y|z)")
 
-    for t in terminos:
-        if t == "":
-            continue
+def parsear_lote(texto, variables=None):
+    """
+    Convierte muchas ecuaciones en una matriz aumentada (M, n+1) de NumPy.
 
-        m = patron.fullmatch(t)
-        if not m:
-            raise ValueError(f"Término inválido: {t}")
+    Cada fila tiene los coeficientes de las n variables y, al final, el
+    término independiente. Devuelve (matriz, variables).
+    """
+    matriz, _, nombres = _aumentada(texto, variables)
+    return matriz, nombres
 
-        coef, var = m.groups()
 
-        if coef in ("", "+", "-"):
-            coef = coef + "1"
+def parsear_sistemas(texto, variables=None):
+    """
+    Convierte sistemas separados por líneas en blanco en un arreglo (S, k, n+1).
 
-        coef = float(coef)
+    Todos los sistemas deben tener k ecuaciones; el resultado se puede pasar
+    directamente a resolver_lote. Devuelve (aumentadas, variables).
+    """
+    matriz, tamanos, nombres = _aumentada(texto, variables)
+    if len(set(tamanos)) > 1:
+        raise ValueError("Todos los sistemas deben tener el mismo número de ecuaciones "
+                         f"(se encontraron {sorted(set(tamanos))})")
+    return matriz.reshape(len(tamanos), tamanos[0] if tamanos else 0, -1), nombres
 
-        if var == "x":
-            a += coef
-        elif var == "y":
-            b += coef
-        elif var == "z":
-            c += coef
 
-    return a, b, c, d
+def leer_sistemas(ruta, variables=None):
+    """parsear_sistemas sobre el contenido de un archivo de texto"""
+    with open(ruta, encoding='utf-8') as archivo:
+        return parsear_sistemas(archivo.read(), variables)
 
 
 # -----------------------------------
@@ -63,6 +197,19 @@ def det3(m):
     )
 
 
+# Un sistema es singular si |det(A)| no supera esta fracción de la cota de
+# Hadamard (producto de las normas de las filas), así no depende de la escala
+TOLERANCIA_SINGULAR = 1e-12
+
+
+def es_singular(A, detA, tolerancia=TOLERANCIA_SINGULAR):
+    """Indica si A (o cada matriz de una pila de matrices) es singular"""
+    A = np.asarray(A, dtype=float)
+    escala = np.prod(np.linalg.norm(A, axis=-1), axis=-1)
+    # Escrito así, un determinante NaN también cuenta como singular
+    return ~(np.abs(detA) > tolerancia * escala)
+
+
 # -----------------------------------
 #   CRAMER + pasos detallados
 # -----------------------------------
@@ -97,7 +244,7 @@ def cramer_pasos(a1,b1,c1,d1, a2,b2,c2,d2, a3,b3,c3,d3):
     detAy = det3(Ay)
     detAz = det3(Az)
 
-    if detA == 0:
+    if es_singular(A, detA):
         raise ValueError("El sistema NO tiene solución única (det(A)=0)")
 
     x = detAx / detA
@@ -130,6 +277,83 @@ z = det(Az) / det(A) = {z}
     return x, y, z, pasos
 
 
+# -----------------------------------
+#   SISTEMAS EN LOTE (NumPy)
+# -----------------------------------
+def det3_lote(m):
+    """Determinantes de una pila (..., 3, 3) de matrices, todos a la vez"""
+    return (
+        m[..., 0, 0] * (m[..., 1, 1]*m[..., 2, 2] - m[..., 1, 2]*m[..., 2, 1]) -
+        m[..., 0, 1] * (m[..., 1, 0]*m[..., 2, 2] - m[..., 1, 2]*m[..., 2, 0]) +
+        m[..., 0, 2] * (m[..., 1, 0]*m[..., 2, 1] - m[..., 1, 1]*m[..., 2, 0])
+    )
+
+
+def resolver_lote(aumentadas, tolerancia=TOLERANCIA_SINGULAR, pasos=()):
+    """
+    Resuelve muchos sistemas lineales a la vez.
+
+    aumentadas es un arreglo (N, n, n+1) con la matriz aumentada [A | d] de
+    cada sistema (o una sola matriz (n, n+1)). Los sistemas 3x3 se resuelven
+    por Cramer con los cuatro determinantes vectorizados; para otros tamaños,
+    donde Cramer costaría n+1 determinantes, se usa numpy.linalg.solve (LU)
+    sobre la pila completa. pasos es una lista de índices de sistemas cuyo
+    desarrollo en texto se quiere, igual que el de cramer_pasos.
+
+    Devuelve (soluciones, singulares, textos): soluciones es (N, n) con NaN
+    en los sistemas singulares, singulares un arreglo booleano (N,) y textos
+    un diccionario índice -> pasos.
+    """
+    M = np.asarray(aumentadas, dtype=float)
+    if M.ndim == 2:
+        M = M[np.newaxis]
+    if M.ndim != 3 or M.shape[2] != M.shape[1] + 1:
+        raise ValueError("Se esperaba un arreglo (N, n, n+1) de matrices aumentadas")
+
+    N, n, _ = M.shape
+    A, d = M[:, :, :n], M[:, :, n]
+    soluciones = np.full((N, n), np.nan)
+
+    with np.errstate(all='ignore'):
+        if n == 3:
+            detA = det3_lote(A)
+            singulares = es_singular(A, detA, tolerancia)
+            validos = ~singulares
+            for columna in range(3):
+                # A con la columna reemplazada por d, solo para los sistemas con solución
+                Ai = A[validos].copy()
+                Ai[:, :, columna] = d[validos]
+                soluciones[validos, columna] = det3_lote(Ai) / detA[validos]
+        else:
+            # El logaritmo del determinante no se desborda con n grande
+            signo, log_det = np.linalg.slogdet(A)
+            log_escala = np.sum(np.log(np.linalg.norm(A, axis=-1)), axis=-1)
+            singulares = ~((signo != 0) & (log_det > np.log(tolerancia) + log_escala))
+            validos = ~singulares
+            if validos.any():
+                soluciones[validos] = np.linalg.solve(A[validos], d[validos][..., np.newaxis])[..., 0]
+
+    textos = {int(i): _texto_pasos(M[i], singulares[i], soluciones[i]) for i in pasos}
+    return soluciones, singulares, textos
+
+
+def _texto_pasos(aumentada, singular, solucion):
+    """Desarrollo en texto de un sistema del lote"""
+    n = aumentada.shape[0]
+    if n == 3:
+        try:
+            return cramer_pasos(*aumentada.ravel().tolist())[3]
+        except ValueError as e:
+            return f"\nMatriz aumentada:\n{aumentada.tolist()}\n\n{e}\n"
+    if singular:
+        return (f"\nMatriz aumentada:\n{aumentada.tolist()}\n\n"
+                "El sistema NO tiene solución única (det(A)=0)\n")
+    variables = "\n".join(f"x{i + 1} = {valor}" for i, valor in enumerate(solucion.tolist()))
+    return (f"\nMatriz aumentada:\n{aumentada.tolist()}\n\n"
+            f"det(A) = {np.linalg.det(aumentada[:, :n])}\n\n"
+            f"Resuelto por factorización LU ({n}x{n}):\n{variables}\n")
+
+
 # -----------------------------------
 #   GRAFICAR PLANOS EN 3D
 # -----------------------------------
@@ -192,18 +416,19 @@ def resolver():
         messagebox.showerror("Error", str(e))
 
 
-root = tk.Tk()
-root.title("Cramer 3x3 — Todo en Python")
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Cramer 3x3 — Todo en Python")
 
-tk.Label(root, text="Ecuación 1:").pack()
-e1 = tk.Entry(root, width=40); e1.pack()
+    tk.Label(root, text="Ecuación 1:").pack()
+    e1 = tk.Entry(root, width=40); e1.pack()
 
-tk.Label(root, text="Ecuación 2:").pack()
-e2 = tk.Entry(root, width=40); e2.pack()
+    tk.Label(root, text="Ecuación 2:").pack()
+    e2 = tk.Entry(root, width=40); e2.pack()
 
-tk.Label(root, text="Ecuación 3:").pack()
-e3 = tk.Entry(root, width=40); e3.pack()
+    tk.Label(root, text="Ecuación 3:").pack()
+    e3 = tk.Entry(root, width=40); e3.pack()
 
-tk.Button(root, text="Resolver y Graficar", command=resolver).pack(pady=10)
+    tk.Button(root, text="Resolver y Graficar", command=resolver).pack(pady=10)
 
-root.mainloop()
+    root.mainloop()
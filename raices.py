@@ -0,0 +1,144 @@
+"""
+Búsqueda numérica de raíces de una función en un intervalo.
+
+La función (y su derivada, si se tiene) se evalúa con NumPy en una malla que
+se ajusta al periodo, de modo que un rango de miles de periodos sigue
+costando milisegundos. Las raíces simples aparecen como cambios de signo en
+la malla; las de multiplicidad par (tangencias, sin cambio de signo) como
+cambios de signo de la derivada donde la función vale casi cero. Todos los
+intervalos encontrados se refinan a la vez con Newton protegido por
+bisección. Se usa cuando solveset no da soluciones explícitas y como método
+numérico de resolver_ecuacion_trig.
+"""
+import math
+
+import numpy as np
+
+from numerico import evaluar
+
+# Máximo de puntos de la malla, para que un rango enorme no agote la memoria
+MAX_PUNTOS = 5_000_000
+
+# Error de una ecuación que se cumple en todo el rango (una identidad como
+# sin(x)**2 + cos(x)**2 = 1), en lugar de en puntos aislados
+MENSAJE_INTERVALO = "La ecuación se cumple en todo un intervalo, no en puntos aislados"
+
+
+def refinar(funcion, a, b, derivada=None, iteraciones=60):
+    """
+    Refina a la vez todos los intervalos [a[i], b[i]] en los que funcion cambia de signo.
+
+    Con derivada se da un paso de Newton siempre que caiga dentro del
+    intervalo y, si no, uno de bisección; el intervalo se achica en cada paso,
+    así que nunca diverge. Termina cuando ningún punto se mueve más que la
+    precisión de los números de punto flotante.
+    """
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    fa = evaluar(funcion, a)
+    x = (a + b) / 2
+    for _ in range(iteraciones):
+        fx = evaluar(funcion, x)
+        izquierda = np.signbit(fx) != np.signbit(fa)
+        b = np.where(izquierda, x, b)
+        a = np.where(izquierda, a, x)
+        fa = np.where(izquierda, fa, fx)
+
+        nuevo = (a + b) / 2
+        if derivada is not None:
+            with np.errstate(all='ignore'):
+                newton = x - fx / evaluar(derivada, x)
+            dentro = np.isfinite(newton) & (newton > a) & (newton < b)
+            nuevo = np.where(dentro, newton, nuevo)
+        nuevo = np.where(fx == 0, x, nuevo)
+        quieto = np.abs(nuevo - x) <= 4 * np.spacing(np.maximum(np.abs(x), 1.0))
+        x = nuevo
+        if quieto.all():
+            break
+    return x
+
+
+def _cambios_de_signo(xs, ys):
+    """Extremos de los intervalos de la malla en los que ys cambia de signo"""
+    cambios = np.isfinite(ys[:-1]) & np.isfinite(ys[1:]) & (ys[:-1] * ys[1:] < 0)
+    return xs[:-1][cambios], xs[1:][cambios]
+
+
+def multiplicidades(derivadas, raices, tolerancia=1e-6):
+    """
+    Multiplicidad de cada raíz: el orden de la primera derivada que no se anula.
+
+    derivadas son las funciones f', f'', ... ya compiladas; si todas se
+    anulan, la multiplicidad es len(derivadas) + 1.
+    """
+    raices = np.asarray(raices, dtype=float)
+    resultado = np.full(raices.shape, len(derivadas) + 1)
+    pendientes = np.ones(raices.shape, dtype=bool)
+    for orden, derivada in enumerate(derivadas, start=1):
+        valores = evaluar(derivada, raices)
+        encontradas = pendientes & (np.abs(valores) > tolerancia)
+        resultado[encontradas] = orden
+        pendientes &= ~encontradas
+    return resultado
+
+
+def buscar_raices(funcion, xmin, xmax, derivada=None, periodo=None, puntos=20001,
+                  puntos_por_periodo=64, tolerancia=1e-6, decimales=5):
+    """
+    Raíces de funcion en [xmin, xmax], ordenadas, sin repetidos y redondeadas.
+
+    Si se conoce el periodo, la malla tiene puntos_por_periodo puntos por
+    periodo (y nunca menos que puntos); así no se pierden raíces en rangos
+    amplios. Los cambios de signo en los que la función no se acerca a cero
+    (polos, como los de tan) se descartan; el residuo se mide en relación a
+    los valores de la malla a cada lado, que pueden ser enormes. Sin derivada no se detectan las
+    raíces de multiplicidad par. Si la función vale cero en toda la malla se
+    lanza ValueError, porque no hay raíces aisladas que devolver.
+    """
+    if periodo:
+        puntos = max(puntos, math.ceil((xmax - xmin) / periodo * puntos_por_periodo) + 1)
+    if puntos > MAX_PUNTOS:
+        raise ValueError(f"El rango necesita más de {MAX_PUNTOS} puntos; redúzcalo")
+    xs = np.linspace(xmin, xmax, puntos)
+    ys = evaluar(funcion, xs)
+    finitos = np.isfinite(ys)
+    if finitos.any() and np.all(np.abs(ys[finitos]) < 1e-12):
+        # Cada punto de la malla sería una raíz
+        raise ValueError(MENSAJE_INTERVALO)
+
+    # Los puntos de la malla que ya son raíces (por ejemplo en los extremos) no
+    # tienen un cambio de signo a su lado
+    a, b = _cambios_de_signo(xs, ys)
+    candidatas = [xs[np.abs(ys) < 1e-12], refinar(funcion, a, b, derivada)]
+    # El residuo de una raíz refinada es el redondeo de los valores que la
+    # rodean: donde la función vale millones se compara en relación a ellos
+    escalas = [np.ones(candidatas[0].size),
+               np.maximum(1.0, np.maximum(np.abs(evaluar(funcion, a)), np.abs(evaluar(funcion, b))))]
+    if derivada is not None:
+        # Tangencias: extremos de la función que tocan el cero
+        extremos = refinar(derivada, *_cambios_de_signo(xs, evaluar(derivada, xs)))
+        extremos = extremos[np.abs(evaluar(funcion, extremos)) < tolerancia * 1e-3]
+        candidatas.append(extremos)
+        escalas.append(np.ones(extremos.size))
+
+    raices = np.concatenate(candidatas)
+    residuos = np.abs(evaluar(funcion, raices)) / np.concatenate(escalas)
+    validas = residuos < tolerancia
+    raices = _agrupar(raices[validas], residuos[validas], (xs[1] - xs[0]) / 2 if puntos > 1 else 0)
+    # Sumar 0.0 convierte el -0.0 que deja el redondeo en 0.0
+    return np.unique(np.round(raices, decimales)) + 0.0
+
+
+def _agrupar(raices, residuos, separacion):
+    """
+    Une las raíces a menos de separacion entre sí y deja la de menor residuo.
+
+    Cerca de una raíz múltiple la función es muy plana: varios puntos de la
+    malla pasan el filtro y representan la misma raíz.
+    """
+    orden = np.argsort(raices)
+    raices, residuos = raices[orden], residuos[orden]
+    grupo = np.cumsum(np.diff(raices, prepend=-np.inf) > separacion)
+    mejores = np.lexsort((residuos, grupo))
+    primeras = np.diff(grupo[mejores], prepend=-1) != 0
+    return raices[mejores[primeras]]
@@ -0,0 +1,299 @@
+"""
+Medición del rendimiento de cada etapa de un cálculo.
+
+Cuando un cálculo "se cuelga" hace falta saber qué etapa fue: sp.solve,
+sp.integrate, sp.singularities o la gráfica. Rendimiento registra por etapa
+el tiempo de reloj y de CPU (el del hilo que la ejecuta, no el de todo el
+proceso, en el que pueden estar corriendo otras etapas), el tamaño de la expresión producida (número de
+operaciones), si el resultado salió del cache y cuántas funciones compiladas
+se reutilizaron. Opcionalmente guarda el perfil de cProfile y el pico de
+memoria de tracemalloc. El informe se muestra en la pestaña "Rendimiento"
+de la calculadora, se incluye en la salida JSON del análisis por lotes y se
+puede exportar como métricas de texto de Prometheus.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+
+from numerico import estadisticas_compilacion
+
+_candado_memoria = threading.Lock()
+
+
+def contar_operaciones(valor):
+    """Número de operaciones de una expresión de sympy (o de las que contenga una lista)"""
+    if hasattr(valor, 'is_subset'):
+        # Un conjunto de solveset puede contener Integers o Reals, que count_ops
+        # intentaría recorrer; se cuentan solo las expresiones que contiene
+        return contar_operaciones([arg for arg in valor.args
+                                   if not hasattr(arg, 'is_subset') or arg.args])
+    if hasattr(valor, 'count_ops'):
+        try:
+            return int(valor.count_ops())
+        except Exception:
+            return None
+    if isinstance(valor, (list, tuple)):
+        cuentas = [contar_operaciones(elemento) for elemento in valor]
+        cuentas = [cuenta for cuenta in cuentas if cuenta is not None]
+        return sum(cuentas) if cuentas else None
+    return None
+
+
+@dataclass
+class MedicionEtapa:
+    """Tiempo, tamaño y uso de cache de una etapa"""
+    etapa: str
+    estado: str = 'en curso'
+    tiempo: float = 0.0
+    # CPU del hilo que ejecutó la etapa; queda en 0 si se abandonó en un hilo auxiliar
+    tiempo_cpu: float = 0.0
+    operaciones: int = None
+    aciertos_compilacion: int = 0
+    memoria_pico: int = None
+    perfil: str = None
+    # Lo que produjo la etapa, hasta que se mide su tamaño al terminar
+    valor: object = field(default=None, repr=False)
+
+    def a_dict(self):
+        """Convierte la medición a un diccionario serializable en JSON"""
+        datos = {
+            'etapa': self.etapa,
+            'estado': self.estado,
+            'tiempo': round(self.tiempo, 6),
+            'tiempo_cpu': round(self.tiempo_cpu, 6),
+            'operaciones': self.operaciones,
+            'aciertos_compilacion': self.aciertos_compilacion,
+        }
+        if self.memoria_pico is not None:
+            datos['memoria_pico'] = self.memoria_pico
+        if self.perfil is not None:
+            datos['perfil'] = self.perfil
+        return datos
+
+
+class Rendimiento:
+    """
+    Mediciones de las etapas de un cálculo, en el orden en que empezaron.
+
+    Con perfilar=True cada etapa se ejecuta bajo cProfile y se guardan sus
+    max_funciones funciones más costosas; con memoria=True se registra el
+    pico de memoria con tracemalloc. Ambas opciones hacen el cálculo más
+    lento y por eso están desactivadas por defecto.
+    """
+
+    def __init__(self, perfilar=False, memoria=False, max_funciones=15):
+        self.perfilar = perfilar
+        self.memoria = memoria
+        self.max_funciones = max_funciones
+        self.etapas = []
+        self._inicios = {}
+
+    # ---------- registro ----------
+
+    def iniciar(self, etapa):
+        """Empieza a medir una etapa y devuelve su MedicionEtapa"""
+        medicion = MedicionEtapa(etapa)
+        self.etapas.append(medicion)
+        self._inicios[id(medicion)] = (time.perf_counter(),
+                                       estadisticas_compilacion()['aciertos'])
+        return medicion
+
+    def terminar(self, medicion, estado='completa', valor=None):
+        """
+        Cierra la medición; valor es lo que produjo la etapa, para medir su tamaño.
+
+        El tiempo de CPU no se toma aquí sino al salir de medir o de la función
+        instrumentada, en el hilo que ejecutó la etapa.
+        """
+        inicio = self._inicios.pop(id(medicion), None)
+        if inicio is None:
+            return medicion
+        reloj, aciertos = inicio
+        medicion.tiempo = time.perf_counter() - reloj
+        medicion.aciertos_compilacion = estadisticas_compilacion()['aciertos'] - aciertos
+        medicion.estado = estado
+        medicion.operaciones = contar_operaciones(valor)
+        medicion.valor = None
+        return medicion
+
+    @contextmanager
+    def medir(self, etapa):
+        """
+        Mide el bloque como una etapa; ejecuta en el mismo hilo el perfil y la memoria.
+
+        Dentro del bloque se puede cambiar medicion.estado y asignar
+        medicion.valor con lo que produjo la etapa.
+        """
+        medicion = self.iniciar(etapa)
+        try:
+            with self._capturar(medicion):
+                yield medicion
+        except BaseException:
+            self.terminar(medicion, 'error', medicion.valor)
+            raise
+        estado = medicion.estado if medicion.estado != 'en curso' else 'completa'
+        self.terminar(medicion, estado, medicion.valor)
+
+    def instrumentar(self, funcion, medicion):
+        """
+        Envuelve funcion para medir su CPU, perfil y memoria en el hilo que la ejecute.
+
+        Hace falta cuando la etapa corre en otro hilo (por ejemplo, dentro de
+        ejecutar_con_limite), porque time.thread_time y cProfile solo
+        observan el hilo actual.
+        """
+        def envuelta(*args, **kwargs):
+            with self._capturar(medicion):
+                return funcion(*args, **kwargs)
+        return envuelta
+
+    @contextmanager
+    def _capturar(self, medicion):
+        """Mide la CPU del hilo y activa cProfile y tracemalloc (si se pidieron) en el bloque"""
+        cpu = time.thread_time()
+        perfil = None
+        if self.perfilar:
+            perfil = cProfile.Profile()
+            try:
+                perfil.enable()
+            except ValueError:
+                # Ya hay otro perfilador activo en este hilo
+                perfil = None
+        iniciado = False
+        if self.memoria:
+            with _candado_memoria:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    iniciado = True
+                else:
+                    tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            # Una etapa abandonada por tiempo agotado sigue en su hilo; su
+            # medición ya se cerró y no se modifica
+            if id(medicion) in self._inicios:
+                medicion.tiempo_cpu = time.thread_time() - cpu
+            if self.memoria:
+                with _candado_memoria:
+                    if tracemalloc.is_tracing():
+                        medicion.memoria_pico = tracemalloc.get_traced_memory()[1]
+                    if iniciado:
+                        tracemalloc.stop()
+            if perfil is not None:
+                perfil.disable()
+                salida = io.StringIO()
+                pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(
+                    self.max_funciones)
+                medicion.perfil = salida.getvalue().strip()
+
+    # ---------- informes ----------
+
+    def tiempo_total(self):
+        return sum(medicion.tiempo for medicion in self.etapas)
+
+    def a_dict(self):
+        """Convierte el informe a un diccionario serializable en JSON"""
+        return {'etapas': [medicion.a_dict() for medicion in self.etapas],
+                'tiempo_total': round(self.tiempo_total(), 6)}
+
+    def resumen(self, con_perfil=True):
+        """Tabla de texto con una fila por etapa, para mostrar en la interfaz"""
+        lineas = [f"{'Etapa':18} {'Estado':10} {'Reloj (s)':>10} {'CPU (s)':>9} "
+                  f"{'Ops':>7} {'Compil.':>7} {'Memoria':>10}"]
+        for medicion in self.etapas:
+            inicio = self._inicios.get(id(medicion))
+            cpu = f"{medicion.tiempo_cpu:9.4f}"
+            if inicio is not None:
+                # Etapa en curso: se muestra cuánto lleva, para ver dónde se detuvo;
+                # la CPU de otro hilo no se puede leer desde aquí
+                medicion = MedicionEtapa(medicion.etapa, medicion.estado,
+                                         time.perf_counter() - inicio[0])
+                cpu = f"{'-':>9}"
+            operaciones = '-' if medicion.operaciones is None else medicion.operaciones
+            memoria = ('-' if medicion.memoria_pico is None
+                       else f"{medicion.memoria_pico / 1024:.0f} KiB")
+            lineas.append(f"{medicion.etapa:18} {medicion.estado:10} {medicion.tiempo:10.4f} "
+                          f"{cpu} {operaciones:>7} "
+                          f"{medicion.aciertos_compilacion:>7} {memoria:>10}")
+        lineas.append(f"{'Total':18} {'':10} {self.tiempo_total():10.4f}")
+        if con_perfil:
+            for medicion in self.etapas:
+                if medicion.perfil:
+                    lineas.append(f"\nPerfil de '{medicion.etapa}':\n{medicion.perfil}")
+        return "\n".join(lineas)
+
+
+def medir(rendimiento, etapa):
+    """rendimiento.medir(etapa), o un bloque que no mide nada si rendimiento es None"""
+    if rendimiento is None:
+        return nullcontext(MedicionEtapa(etapa))
+    return rendimiento.medir(etapa)
+
+# ==================== MÉTRICAS DE PROMETHEUS ====================
+
+# Nombre, tipo, descripción y cómo se acumula cada métrica por etapa
+_METRICAS = (
+    ('calculo_etapa_ejecuciones_total', 'counter', "Etapas ejecutadas, por estado"),
+    ('calculo_etapa_segundos_total', 'counter', "Tiempo de reloj acumulado por etapa"),
+    ('calculo_etapa_cpu_segundos_total', 'counter', "Tiempo de CPU acumulado por etapa"),
+    ('calculo_etapa_operaciones_total', 'counter',
+     "Operaciones acumuladas de las expresiones producidas por etapa"),
+    ('calculo_etapa_cache_aciertos_total', 'counter', "Etapas tomadas del cache de resultados"),
+    ('calculo_etapa_compilacion_aciertos_total', 'counter',
+     "Funciones compiladas reutilizadas por etapa"),
+    ('calculo_etapa_memoria_pico_bytes', 'gauge', "Mayor pico de memoria observado por etapa"),
+)
+
+
+def _etiquetas(valores):
+    def escapar(valor):
+        return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return "{" + ",".join(f'{clave}="{escapar(valor)}"' for clave, valor in valores.items()) + "}"
+
+
+def _numero(valor):
+    return str(valor) if isinstance(valor, int) else repr(float(valor))
+
+
+def metricas_prometheus(informes, etiquetas=None):
+    """
+    Acumula varios informes Rendimiento y los escribe en el formato de texto de Prometheus.
+
+    etiquetas se agregan a todas las series (por ejemplo {'programa': 'analisis'}).
+    """
+    etiquetas = dict(etiquetas or {})
+    series = {nombre: {} for nombre, _, _ in _METRICAS}
+
+    def sumar(nombre, claves, valor):
+        serie = series[nombre]
+        serie[claves] = serie.get(claves, 0) + valor
+
+    for informe in informes:
+        for medicion in informe.etapas:
+            etapa = (('etapa', medicion.etapa),)
+            sumar('calculo_etapa_ejecuciones_total', etapa + (('estado', medicion.estado),), 1)
+            sumar('calculo_etapa_segundos_total', etapa, medicion.tiempo)
+            sumar('calculo_etapa_cpu_segundos_total', etapa, medicion.tiempo_cpu)
+            sumar('calculo_etapa_operaciones_total', etapa, medicion.operaciones or 0)
+            sumar('calculo_etapa_cache_aciertos_total', etapa, int(medicion.estado == 'cache'))
+            sumar('calculo_etapa_compilacion_aciertos_total', etapa,
+                  medicion.aciertos_compilacion)
+            if medicion.memoria_pico is not None:
+                pico = series['calculo_etapa_memoria_pico_bytes']
+                pico[etapa] = max(pico.get(etapa, 0), medicion.memoria_pico)
+
+    lineas = []
+    for nombre, tipo, descripcion in _METRICAS:
+        if not series[nombre]:
+            continue
+        lineas.append(f"# HELP {nombre} {descripcion}")
+        lineas.append(f"# TYPE {nombre} {tipo}")
+        for claves, valor in sorted(series[nombre].items()):
+            lineas.append(f"{nombre}{_etiquetas({**etiquetas, **dict(claves)})} {_numero(valor)}")
+    return "\n".join(lineas) + "\n"
@@ -0,0 +1,68 @@
+"""
+Ecuaciones mal formadas y bien formadas en los dos caminos del parser de prgram.py.
+
+parsear interpreta una ecuación suelta y parsear_lote un texto con muchas;
+ambos usan el mismo tokenizador y deben rechazar y aceptar lo mismo.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import prgram
+
+VARIABLES = ('x', 'y', 'z')
+
+MAL_FORMADAS = [
+    "2*-x=1",       # '*' seguido de un signo
+    "2*+y=1",
+    "2*=1",         # '*' sin variable
+    "x+3*=4",
+    "*x=1",
+    "x*=1",
+    "x*2=1",
+    "2x+3y",        # sin '='
+    "=5",           # sin lado izquierdo
+    "2x=",          # sin lado derecho
+    "2x=3=4",       # dos '='
+    "2x 3y=1",      # falta un operador
+    "2x+=1",
+    "x+w=1",        # variable desconocida
+    "1.2.3x=1",
+    "2x+$=1",
+]
+
+BIEN_FORMADAS = [
+    ("2x - 3y + z = 5", (2, -3, 1, 5)),
+    ("2*x+3 * y=1", (2, 3, 0, 1)),
+    ("-x=-2", (-1, 0, 0, -2)),
+    ("x/2 + 1/4 y = 3", (0.5, 0.25, 0, 3)),
+    ("1e-3x + .5z = 2 - y", (1e-3, 1, 0.5, 2)),
+    ("x + x = 4  # comentario", (2, 0, 0, 4)),
+]
+
+
+@pytest.mark.parametrize("ecuacion", MAL_FORMADAS)
+def test_parsear_rechaza(ecuacion):
+    with pytest.raises(ValueError):
+        prgram.parsear.__wrapped__(ecuacion)
+
+
+@pytest.mark.parametrize("ecuacion", MAL_FORMADAS)
+def test_parsear_lote_rechaza(ecuacion):
+    with pytest.raises(ValueError):
+        prgram.parsear_lote(f"x+y+z=1\n{ecuacion}\n", VARIABLES)
+
+
+@pytest.mark.parametrize("ecuacion, esperado", BIEN_FORMADAS)
+def test_los_dos_caminos_coinciden(ecuacion, esperado):
+    assert prgram.parsear.__wrapped__(ecuacion) == pytest.approx(esperado)
+    matriz, nombres = prgram.parsear_lote(f"x+y+z=1\n{ecuacion}\n", VARIABLES)
+    assert nombres == list(VARIABLES)
+    assert np.allclose(matriz[1], esperado)